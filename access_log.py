@@ -0,0 +1,176 @@
+import atexit
+import csv
+import os
+import queue
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+# ------------------------------
+# Background Access Logger
+# ------------------------------
+# The page only drops (client IP, city) onto a bounded queue; one
+# daemon thread appends rows to user_log.csv in batches. Because there is a
+# single writer per process, concurrent sessions no longer race on the file
+# and the render path never waits for disk I/O. The file is rotated like
+# logging's RotatingFileHandler (user_log.csv.1, .2, ...) once it reaches
+# ACCESS_LOG_MAX_BYTES, so it can't grow without limit.
+
+ACCESS_LOG_PATH = os.getenv(
+    "ACCESS_LOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "user_log.csv")
+)
+ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", "1000"))
+ACCESS_LOG_BATCH_SIZE = int(os.getenv("ACCESS_LOG_BATCH_SIZE", "50"))
+ACCESS_LOG_FLUSH_INTERVAL = float(os.getenv("ACCESS_LOG_FLUSH_INTERVAL", "2.0"))
+ACCESS_LOG_MAX_BYTES = int(os.getenv("ACCESS_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+ACCESS_LOG_BACKUPS = int(os.getenv("ACCESS_LOG_BACKUPS", "3"))
+# Reverse proxies in front of the app that append to X-Forwarded-For; 0 = none
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+
+def client_address(peer, forwarded=None, trusted_hops=TRUSTED_PROXY_HOPS):
+    """The visitor's IP from the socket peer and the X-Forwarded-For header.
+
+    Anyone can send X-Forwarded-For, so it is only read behind
+    `trusted_hops` proxies of our own, each of which appended one entry:
+    the visitor is the right-most entry they did not add. Without trusted
+    proxies, or when the header is shorter than that, the peer is used.
+    """
+    hops = [h.strip() for h in forwarded.split(",") if h.strip()] if isinstance(forwarded, str) else []
+    if trusted_hops > 0 and len(hops) >= trusted_hops:
+        return hops[-trusted_hops]
+    return peer if isinstance(peer, str) and peer else "unknown"
+
+
+def rotated_path(path, n):
+    """Name of the `n`-th rotated copy of `path` (1 is the most recent)."""
+    return f"{path}.{n}"
+
+
+class _BoundedDict(OrderedDict):
+    """Tiny LRU dict so per-session state can't grow without limit."""
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+class AccessLogger:
+    def __init__(self, path=ACCESS_LOG_PATH, maxsize=ACCESS_LOG_QUEUE_SIZE,
+                 batch_size=ACCESS_LOG_BATCH_SIZE, flush_interval=ACCESS_LOG_FLUSH_INTERVAL,
+                 max_bytes=ACCESS_LOG_MAX_BYTES, backups=ACCESS_LOG_BACKUPS, max_sessions=10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._last_city = _BoundedDict(max_sessions)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.logged = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self.written = 0
+        self.write_errors = 0
+        self.rotations = 0
+
+    def log(self, session_id, city, ip="unknown"):
+        """Queue one access record for `ip`. Never blocks; returns False if skipped."""
+        city = " ".join(city.split())
+        key = city.lower()
+        with self._lock:
+            if self._last_city.get(session_id) == key:
+                # Same city on another rerun of the same session
+                self.duplicates += 1
+                return False
+            self._last_city[session_id] = key
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((ip, datetime.now(), city))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.logged += 1
+        return True
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="access-log", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _rotate(self):
+        # Only the writer thread calls this, so nothing else has the file open
+        if self.max_bytes <= 0 or not os.path.exists(self.path) or os.path.getsize(self.path) < self.max_bytes:
+            return
+        if self.backups <= 0:
+            os.remove(self.path)
+        else:
+            for n in range(self.backups - 1, 0, -1):
+                if os.path.exists(rotated_path(self.path, n)):
+                    os.replace(rotated_path(self.path, n), rotated_path(self.path, n + 1))
+            os.replace(self.path, rotated_path(self.path, 1))
+        self.rotations += 1
+
+    def _write(self, batch):
+        rows = [
+            [ip, when.strftime('%Y-%m-%d'), when.strftime('%H:%M:%S'), city]
+            for ip, when, city in batch
+        ]
+        try:
+            self._rotate()
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                csv.writer(f, lineterminator="\n").writerows(rows)
+            self.written += len(rows)
+        except OSError:
+            self.write_errors += len(rows)
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far has been written."""
+        if self._thread is None:
+            return
+        if timeout is None:
+            self._queue.join()
+            return
+        done = threading.Event()
+        threading.Thread(target=lambda: (self._queue.join(), done.set()), daemon=True).start()
+        done.wait(timeout)
+
+    def stats(self):
+        return {
+            "logged": self.logged,
+            "duplicates": self.duplicates,
+            "dropped": self.dropped,
+            "written": self.written,
+            "write_errors": self.write_errors,
+            "rotations": self.rotations,
+            "queued": self._queue.qsize(),
+        }
+
+
+access_logger = AccessLogger()
+atexit.register(access_logger.flush, timeout=5)
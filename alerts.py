@@ -0,0 +1,155 @@
+import os
+import queue
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from metrics import span
+from providers import is_offline
+from ratelimit import TokenBucket
+
+load_dotenv()
+
+# ------------------------------
+# SMS Alert Dispatcher
+# ------------------------------
+# Pages call dispatcher.submit(); a worker thread does the actual sending, so
+# the render path never waits on Twilio. Repeat alerts for the same recipient
+# and city are dropped while one is queued or within the dedup window after
+# it was delivered; a failed send does not count. A token bucket caps the
+# overall send rate.
+
+TWILIO_SID = os.getenv("TWILIO_SID")
+TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+TWILIO_NUMBER = os.getenv("TWILIO_NUMBER")
+TO_NUMBER = os.getenv("TO_NUMBER")
+
+# Offline runs (replay/synthetic weather) never send real SMS unless asked to
+ALERT_TRANSPORT = os.getenv("ALERT_TRANSPORT", "stub" if is_offline() else "twilio")
+ALERT_DEDUP_WINDOW = float(os.getenv("ALERT_DEDUP_WINDOW", "3600"))
+ALERT_RATE_PER_MINUTE = float(os.getenv("ALERT_RATE_PER_MINUTE", "6"))
+ALERT_BURST = int(os.getenv("ALERT_BURST", "3"))
+ALERT_QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", "100"))
+
+QUEUED = "queued"
+DUPLICATE = "duplicate"
+RATE_LIMITED = "rate_limited"
+DROPPED = "dropped"
+
+
+class TwilioTransport:
+    """Sends SMS through one lazily created, reused Twilio client."""
+
+    def __init__(self, sid=TWILIO_SID, token=TWILIO_AUTH_TOKEN, from_=TWILIO_NUMBER):
+        self.sid = sid
+        self.token = token
+        self.from_ = from_
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                from twilio.rest import Client
+                self._client = Client(self.sid, self.token)
+            return self._client
+
+    def send(self, to, body):
+        self._get_client().messages.create(body=body, from_=self.from_, to=to)
+
+
+class StubTransport:
+    """Records messages instead of sending them. For tests and offline runs."""
+
+    def __init__(self):
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send(self, to, body):
+        with self._lock:
+            self.sent.append((to, body))
+
+
+TRANSPORTS = {"twilio": TwilioTransport, "stub": StubTransport}
+
+
+class AlertDispatcher:
+    def __init__(self, transport, dedup_window=ALERT_DEDUP_WINDOW,
+                 rate_per_minute=ALERT_RATE_PER_MINUTE, burst=ALERT_BURST,
+                 maxsize=ALERT_QUEUE_SIZE, clock=time.monotonic):
+        self.transport = transport
+        self.dedup_window = dedup_window
+        self.limiter = TokenBucket.per_minute(rate_per_minute, burst, clock=clock)
+        self._clock = clock
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._last_sent = {}
+        self._pending = set()  # keys queued but not yet sent
+        self._lock = threading.Lock()
+        self._thread = None
+        self.counts = {QUEUED: 0, DUPLICATE: 0, RATE_LIMITED: 0, DROPPED: 0, "sent": 0, "failed": 0}
+        self.last_error = None
+
+    def submit(self, city, message, to=TO_NUMBER):
+        """Queue an alert without blocking. Returns one of the status constants."""
+        key = (to, " ".join(city.split()).lower())
+        now = self._clock()
+        with self._lock:
+            last = self._last_sent.get(key)
+            if key in self._pending or (last is not None and now - last < self.dedup_window):
+                return self._count(DUPLICATE)
+            if not self.limiter.try_acquire():
+                return self._count(RATE_LIMITED)
+            try:
+                self._queue.put_nowait((key, to, message))
+            except queue.Full:
+                return self._count(DROPPED)
+            self._pending.add(key)
+            self._ensure_worker()
+            return self._count(QUEUED)
+
+    def _count(self, status):
+        self.counts[status] += 1
+        return status
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="alert-dispatch", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            key, to, message = self._queue.get()
+            try:
+                with span("sms_send"):
+                    self.transport.send(to, message)
+                self._sent(key)
+            except Exception as e:
+                # Not delivered: the next submit for this city may try again
+                with self._lock:
+                    self._pending.discard(key)
+                self.counts["failed"] += 1
+                self.last_error = str(e)
+            finally:
+                self._queue.task_done()
+
+    def _sent(self, key):
+        # The dedup window starts at delivery, not when the alert was queued
+        now = self._clock()
+        with self._lock:
+            self._pending.discard(key)
+            self._last_sent[key] = now
+            # Forget expired dedup entries so the map stays small
+            if len(self._last_sent) > 1000:
+                self._last_sent = {k: t for k, t in self._last_sent.items() if now - t < self.dedup_window}
+        self.counts["sent"] += 1
+
+    def flush(self):
+        """Block until every queued alert has been handed to the transport."""
+        self._queue.join()
+
+    def stats(self):
+        return {**self.counts, "queued_now": self._queue.qsize(), "last_error": self.last_error}
+
+
+dispatcher = AlertDispatcher(TRANSPORTS[ALERT_TRANSPORT]())
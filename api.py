@@ -0,0 +1,252 @@
+"""Headless JSON flood-risk API, served next to the Streamlit UI.
+
+    python api.py --port 8502
+
+    GET  /risk?city=Delhi[&forecast=1]      one city (or ?lat=..&lon=..)
+    GET  /risk/batch?cities=Delhi,Mumbai    several cities
+    POST /risk/batch  {"cities": [...]}
+    GET  /risk/all                          every city in cities.csv
+    GET  /health, /stats
+    GET  /metrics                           stage timings, Prometheus text format
+
+Uses the same fetch functions and model as the UI, with no Streamlit rendering
+in the request path. Run standalone it is a separate process, so its caches
+and OpenWeather quota bucket are its own. With API_IN_PROCESS=1 the Streamlit
+app serves it from a daemon thread instead (see start_in_process), sharing
+the UI's caches, single-flight and quota limiter.
+"""
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from cache import cache_stats
+from city_names import india_name_index
+from metrics import registry, timed
+from model import live_model, predict_live_batch
+from risk import ALERTS
+from sweep import SWEEP_CONCURRENCY, latest_sweep
+from weather_service import get_weather, get_flood_forecast, openweather_stats
+
+API_MAX_BATCH = int(os.getenv("API_MAX_BATCH", "200"))
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8502"))
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _risk(level, score):
+    return {"level": level, "score": round(float(score), 2), "alert": ALERTS[level]}
+
+
+def _resolve(city):
+    """(canonical name, lat, lon) from cities.csv, or None for an unknown name."""
+    match = india_name_index().resolve(city)
+    if match is None:
+        return None
+    row = match[0]
+    return row["city"], float(row["lat"]), float(row["lng"])
+
+
+@timed("api_risk")
+def city_risk(city=None, lat=None, lon=None, forecast=False):
+    if lat is None or lon is None:
+        # Unknown names are answered locally, without an upstream call
+        resolved = _resolve(city)
+        if resolved is None:
+            return None
+        city, lat, lon = resolved
+    weather = get_weather(city, lat=lat, lon=lon)
+    if weather is None:
+        return None
+    scored = predict_live_batch(
+        weather["rainfall"], weather["humidity"], weather["wind_speed"], weather["temperature"]
+    )
+    result = {
+        "city": city,
+        "weather": weather,
+        "risk": _risk(str(np.ravel(scored["level"])[0]), scored["score"]),
+        "model": scored["source"],
+    }
+    if forecast:
+        forecast_df = get_flood_forecast(city, lat=lat, lon=lon)
+        result["forecast"] = None if forecast_df is None else forecast_df.to_dict("records")
+    return result
+
+
+@timed("api_batch")
+def batch_risk(cities):
+    if len(cities) > API_MAX_BATCH:
+        raise BadRequest(f"at most {API_MAX_BATCH} cities per batch")
+    names = [" ".join(c.split()) for c in cities if c and c.strip()]
+    locations = {name: _resolve(name) for name in names}
+    known = [name for name in names if locations[name] is not None]
+    with ThreadPoolExecutor(max_workers=max(1, min(SWEEP_CONCURRENCY, len(known)))) as pool:
+        observations = list(pool.map(lambda name: get_weather(*locations[name], bulk=True), known))
+    ok = [(name, w) for name, w in zip(known, observations) if w is not None]
+    results = {name: None for name in names}
+    if ok:
+        scored = predict_live_batch(
+            [w["rainfall"] for _, w in ok], [w["humidity"] for _, w in ok],
+            [w["wind_speed"] for _, w in ok], [w["temperature"] for _, w in ok],
+        )
+        for i, (name, weather) in enumerate(ok):
+            results[name] = {
+                "city": locations[name][0],
+                "weather": weather,
+                "risk": _risk(scored["level"][i], scored["score"][i]),
+            }
+    return {"model": live_model.version, "results": results,
+            "missing": [name for name, r in results.items() if r is None]}
+
+
+@timed("api_all")
+def all_risk():
+    risk_df = latest_sweep()
+    return {"model": live_model.version, "count": int(risk_df["ok"].sum()),
+            "results": json.loads(risk_df.to_json(orient="records"))}
+
+
+def stats():
+    return {"cache": cache_stats(), "openweather": openweather_stats(), "model": live_model.stats(),
+            "stages": registry.snapshot()}
+
+
+class RiskHandler(BaseHTTPRequestHandler):
+    server_version = "FloodRiskAPI/1.0"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        self._dispatch(url.path.rstrip("/") or "/", query, None)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "body must be JSON"})
+        if not isinstance(body, dict):
+            return self._send(400, {"error": "body must be a JSON object"})
+        self._dispatch(url.path.rstrip("/"), {}, body)
+
+    def _dispatch(self, path, query, body):
+        try:
+            if path == "/health":
+                return self._send(200, {"status": "ok"})
+            if path == "/stats":
+                return self._send(200, stats())
+            if path == "/metrics":
+                return self._send_text(200, registry.render_prometheus())
+            if path == "/risk" and body is None:
+                city, lat, lon = query.get("city"), query.get("lat"), query.get("lon")
+                if not city and (lat is None or lon is None):
+                    raise BadRequest("pass city=<name> or lat=<lat>&lon=<lon>")
+                try:
+                    lat = None if lat is None else float(lat)
+                    lon = None if lon is None else float(lon)
+                except ValueError:
+                    raise BadRequest("lat and lon must be numbers")
+                result = city_risk(city, lat, lon, forecast=query.get("forecast") in ("1", "true"))
+                if result is None:
+                    error = {"error": "city not found or weather API error"}
+                    if city and (lat is None or lon is None) and _resolve(city) is None:
+                        error = {"error": "unknown city", "suggestions": india_name_index().suggest(city)}
+                    return self._send(404, error)
+                return self._send(200, result)
+            if path == "/risk/batch":
+                cities = body.get("cities") if body is not None else query.get("cities", "").split(",")
+                if not isinstance(cities, list) or not any(cities):
+                    raise BadRequest("pass a non-empty list of cities")
+                return self._send(200, batch_risk([str(c) for c in cities]))
+            if path == "/risk/all" and body is None:
+                return self._send(200, all_risk())
+            self._send(404, {"error": "not found"})
+        except BadRequest as e:
+            self._send(400, {"error": str(e)})
+        except Exception as e:
+            self._send(500, {"error": str(e)})
+
+    def _send(self, status, body):
+        data = json.dumps(body, default=_json_default, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_text(self, status, text):
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host=API_HOST, port=API_PORT):
+    server = ThreadingHTTPServer((host, port), RiskHandler)
+    server.daemon_threads = True
+    return server
+
+
+_server = None
+_server_lock = threading.Lock()
+server_error = None
+
+
+def start_in_process(host=API_HOST, port=API_PORT):
+    """Serve the API from a daemon thread of the calling process (the Streamlit app).
+
+    Safe to call on every rerun: only the first call binds the port. If the
+    port is taken (e.g. a second app process) the error is kept in
+    `server_error` and the app runs without the API.
+    """
+    global _server, server_error
+    if _server is not None or server_error is not None:
+        return _server
+    with _server_lock:
+        if _server is None and server_error is None:
+            try:
+                _server = make_server(host, port)
+            except OSError as e:
+                server_error = str(e)
+                return None
+            threading.Thread(target=_server.serve_forever, name="api", daemon=True).start()
+    return _server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    args = parser.parse_args()
+    server = make_server(args.host, args.port)
+    print(f"Flood risk API on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
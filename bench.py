@@ -0,0 +1,338 @@
+"""Offline benchmark suite for the request path and the map page.
+
+Weather comes from the synthetic provider (or replayed recordings), so runs
+need no network and no API key. Results are JSON, keyed by benchmark name and
+size, so two runs (e.g. two commits) can be compared directly.
+
+    python bench.py                               # table
+    python bench.py --out bench.json              # also save JSON
+    python bench.py --only predict --sizes 1,160
+    python bench.py --compare old.json --max-regression 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(ROOT, "weather.py")
+PAGES = [
+    "Home - Flood Prediction",
+    "Map Selection",
+    "Help Assistant",
+    "Flood Safety Tips",
+    "About",
+]
+SIZES = (1, 160, 10000)
+LOOP_MAX = 100
+FORECAST_DAYS = 10
+FIXED_NOW = 1_751_328_000  # synthetic payloads are generated for this instant
+
+
+def _offline_env(provider):
+    # Must run before any app module is imported: they read these at import
+    os.environ["WEATHER_PROVIDER"] = provider
+    os.environ["PREFETCH_ENABLED"] = "0"
+    os.environ["HISTORY_ENABLED"] = "0"
+    os.environ["ACCESS_LOG_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench-"), "user_log.csv")
+
+
+# ------------------------------
+# Timing
+# ------------------------------
+def _time(fn, min_time, max_repeats):
+    """Run `fn` once to warm up, then until `min_time` seconds (at least 3 runs)."""
+    fn()
+    samples = []
+    while len(samples) < max_repeats and (len(samples) < 3 or sum(samples) < min_time):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _result(name, size, samples):
+    ordered = sorted(samples)
+    median = ordered[len(ordered) // 2]
+    return {
+        "name": name,
+        "size": size,
+        "repeats": len(ordered),
+        "median_ms": round(median * 1000, 4),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 4),
+        "per_sec": round(size / median, 1) if median else None,
+    }
+
+
+def _per_city(name, n, loop_max, make_fn, min_time, max_repeats):
+    """Time one call per city. Above `loop_max` cities the calls are timed on a
+    `loop_max`-city sample and scaled up: the calls are independent, so the
+    cost is linear in the number of cities."""
+    sample = min(n, loop_max)
+    samples = _time(make_fn(sample), min_time, max_repeats)
+    result = _result(name, n, [t * n / sample for t in samples])
+    if sample < n:
+        result["sampled"] = sample
+    return result
+
+
+# ------------------------------
+# Inputs
+# ------------------------------
+def _coords(n):
+    """`n` distinct points: the cities.csv locations, nudged apart when repeated."""
+    from cities import load_india_cities
+    cities = load_india_cities()
+    lat, lng = cities["lat"].to_numpy(), cities["lng"].to_numpy()
+    return [
+        {"lat": round(float(lat[i % len(lat)]) + 0.01 * (i // len(lat)), 4), "lon": float(lng[i % len(lng)])}
+        for i in range(n)
+    ]
+
+
+def _observations(n):
+    from stub_weather import synthetic_current
+    weathers = []
+    for params in _coords(n):
+        payload = synthetic_current(params, FIXED_NOW)
+        weathers.append({
+            "temperature": payload["main"]["temp"],
+            "humidity": payload["main"]["humidity"],
+            "wind_speed": payload["wind"]["speed"],
+            "rainfall": payload.get("rain", {}).get("1h", 0),
+        })
+    return weathers
+
+
+@lru_cache(maxsize=None)
+def _forecast_payloads(n):
+    from stub_weather import synthetic_forecast
+    return {f"{p['lat']},{p['lon']}": synthetic_forecast(p, FIXED_NOW) for p in _coords(n)}
+
+
+# ------------------------------
+# Benchmarks
+# ------------------------------
+def bench_predict(sizes, loop_max, min_time, max_repeats):
+    """Live risk: per-city calls (Home page) and one batched call (map sweep)."""
+    from model import predict_flood_live, predict_live_batch
+
+    results = []
+    for n in sizes:
+        weathers = _observations(n)
+        results.append(_per_city(
+            "predict_flood_live", n, loop_max,
+            lambda k: lambda: [predict_flood_live(w) for w in weathers[:k]], min_time, max_repeats))
+        columns = [[w[k] for w in weathers] for k in ("rainfall", "humidity", "wind_speed", "temperature")]
+        results.append(_result("predict_live_batch", n, _time(
+            lambda: predict_live_batch(*columns), min_time, max_repeats)))
+    return results
+
+
+def bench_forecast_scoring(sizes, loop_max, min_time, max_repeats):
+    """Forecast risk table per city (Home page) and stacked for all cities."""
+    from forecast import aggregate_many
+    from risk import forecast_rain, score_forecast, score_forecast_batch
+
+    results = []
+    for n in sizes:
+        def per_city(k):
+            sample = aggregate_many(_forecast_payloads(k), FORECAST_DAYS)
+            frames = [frame.drop(columns="city") for _, frame in sample.groupby("city", sort=False)]
+            return lambda: [score_forecast(f) for f in frames]
+
+        results.append(_per_city("score_forecast", n, loop_max, per_city, min_time, max_repeats))
+        daily = aggregate_many(_forecast_payloads(n), FORECAST_DAYS)
+        results.append(_result("score_forecast_batch", n, _time(
+            lambda: score_forecast_batch(forecast_rain(daily), daily["humidity_mean"], daily["temp"]), min_time, max_repeats)))
+    return results
+
+
+def bench_forecast_parsing(sizes, loop_max, min_time, max_repeats):
+    """/forecast payload -> daily rows, directly and through get_forecast()."""
+    from cache import forecast_cache
+    from forecast import aggregate_daily, aggregate_many, parse_forecast
+    from weather_service import get_forecast
+
+    results = []
+    for n in sizes:
+        payloads = _forecast_payloads(n)
+        results.append(_per_city(
+            "parse_forecast", n, loop_max,
+            lambda k: lambda: [aggregate_daily(parse_forecast(p), FORECAST_DAYS)
+                               for p in list(payloads.values())[:k]],
+            min_time, max_repeats))
+        results.append(_result("aggregate_many", n, _time(
+            lambda: aggregate_many(payloads, FORECAST_DAYS), min_time, max_repeats)))
+
+    # Cache miss through the provider, limiter and single-flight, then a hit
+    coords = _coords(1)[0]
+
+    def cold():
+        forecast_cache.clear()
+        get_forecast(lat=coords["lat"], lon=coords["lon"], days=FORECAST_DAYS)
+
+    results.append(_result("get_forecast_miss", 1, _time(cold, min_time, max_repeats)))
+    results.append(_result("get_forecast_hit", 1, _time(
+        lambda: get_forecast(lat=coords["lat"], lon=coords["lon"], days=FORECAST_DAYS), min_time, max_repeats)))
+    return results
+
+
+def bench_map(sizes, loop_max, min_time, max_repeats):
+    """Map Selection building blocks, uncached: city table, markers, HTML."""
+    import pandas as pd
+    from cities import load_india_cities
+    from map_view import load_map_cities, city_markers_geojson, build_base_map, risk_overlay
+
+    def load():
+        load_india_cities.cache_clear()
+        load_india_cities()
+
+    def markers():
+        city_markers_geojson.clear()
+        city_markers_geojson()
+
+    def base_map_html():
+        city_markers_geojson.clear()
+        build_base_map().get_root().render()
+
+    cities = load_map_cities()
+    risk_df = pd.DataFrame({
+        "city": cities["city"], "lat": cities["lat"], "lng": cities["lng"],
+        "Risk Level": ["Low", "Medium", "High"] * (len(cities) // 3) + ["Low"] * (len(cities) % 3),
+        "ok": True,
+    })
+    return [
+        _result("load_cities_csv", len(cities), _time(load, min_time, max_repeats)),
+        _result("city_markers", len(cities), _time(markers, min_time, max_repeats)),
+        _result("base_map_html", len(cities), _time(base_map_html, min_time, max_repeats)),
+        _result("risk_overlay", len(cities), _time(lambda: risk_overlay(risk_df), min_time, max_repeats)),
+    ]
+
+
+def bench_pages(sizes, loop_max, min_time, max_repeats):
+    """Headless script runs of every page: first run of a session, then a rerun."""
+    from streamlit.testing.v1 import AppTest
+
+    results = []
+    for page in PAGES:
+        session = {}
+
+        def first_run():
+            at = AppTest.from_file(APP, default_timeout=120)
+            at.run()
+            at.sidebar.radio[0].set_value(page).run()
+            if page.startswith("Home"):
+                at.text_input[0].set_value("Delhi").run()
+            session["at"] = at
+
+        results.append(_result(f"page_first_run:{page}", 1, _time(first_run, min_time, max_repeats)))
+        results.append(_result(f"page_rerun:{page}", 1, _time(lambda: session["at"].run(), min_time, max_repeats)))
+    return results
+
+
+BENCHMARKS = {
+    "predict": bench_predict,
+    "forecast_scoring": bench_forecast_scoring,
+    "forecast_parsing": bench_forecast_parsing,
+    "map": bench_map,
+    "pages": bench_pages,
+}
+
+
+# ------------------------------
+# Reporting
+# ------------------------------
+def _meta(provider):
+    import numpy
+    import pandas
+    import streamlit
+    from model import live_model
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=ROOT,
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "provider": provider,
+        "model": live_model.version,
+        "versions": {"numpy": numpy.__version__, "pandas": pandas.__version__, "streamlit": streamlit.__version__},
+    }
+
+
+def compare(current, baseline):
+    """Rows of (name, size, old_ms, new_ms, ratio) for benchmarks in both runs."""
+    old = {(r["name"], r["size"]): r["median_ms"] for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        before = old.get((r["name"], r["size"]))
+        if before:
+            rows.append((r["name"], r["size"], before, r["median_ms"], r["median_ms"] / before))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", action="append", choices=list(BENCHMARKS), help="benchmark group(s), default all")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma-separated city counts")
+    parser.add_argument("--loop-max", type=int, default=LOOP_MAX,
+                        help="one-call-per-city variants time at most this many cities and scale up")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to spend per benchmark")
+    parser.add_argument("--max-repeats", type=int, default=50)
+    parser.add_argument("--provider", choices=["synthetic", "replay"], default="synthetic")
+    parser.add_argument("--out", help="write the JSON results here")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--max-regression", type=float,
+                        help="fail if any median is slower than baseline by more than this fraction")
+    args = parser.parse_args()
+
+    _offline_env(args.provider)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    report = {"meta": _meta(args.provider), "results": []}
+    for name in args.only or BENCHMARKS:
+        start = time.perf_counter()
+        report["results"] += BENCHMARKS[name](sizes, args.loop_max, args.min_time, args.max_repeats)
+        print(f"{name}: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'Benchmark':<40}{'size':>7}{'median ms':>13}{'p95 ms':>13}{'per sec':>13}")
+        for r in report["results"]:
+            print(f"{r['name']:<40}{r['size']:>7}{r['median_ms']:>13.3f}{r['p95_ms']:>13.3f}{r['per_sec'] or '':>13}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            rows = compare(report, json.load(f))
+        print(f"\n{'Benchmark':<40}{'size':>7}{'old ms':>11}{'new ms':>11}{'change':>9}", file=sys.stderr)
+        for name, size, before, after, ratio in rows:
+            print(f"{name:<40}{size:>7}{before:>11}{after:>11}{ratio - 1:>+9.1%}", file=sys.stderr)
+        if args.max_regression is not None:
+            slow = [f"{name}[{size}]" for name, size, _, _, ratio in rows if ratio > 1 + args.max_regression]
+            if slow:
+                print(f"Slower than baseline by more than {args.max_regression:.0%}: {', '.join(slow)}",
+                      file=sys.stderr)
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+import os
+from functools import lru_cache
+
+import pandas as pd
+
+# ------------------------------
+# City Table (cities.csv)
+# ------------------------------
+CITIES_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cities.csv")
+
+
+@lru_cache(maxsize=None)
+def load_india_cities(path=CITIES_CSV):
+    """Indian cities from cities.csv, parsed once per process. Treat as read-only."""
+    cities_df = pd.read_csv(path)
+    india_cities = cities_df[cities_df["country"] == "India"].reset_index(drop=True)
+    return india_cities
@@ -0,0 +1,154 @@
+import bisect
+import re
+import unicodedata
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+from cities import load_india_cities
+
+# ------------------------------
+# City Name Index (prefix + trigram)
+# ------------------------------
+# Resolves whatever was typed into the city box to one row of cities.csv, so
+# weather is fetched and cached by coordinates: "delhi", "Delhi " and "Dehli"
+# all share one upstream call, and names that match nothing are rejected
+# without one. Names are compared accent- and case-folded ("Kolkata" finds
+# "Kolkāta"), and "City, State" picks between cities by admin_name.
+
+FUZZY_MIN_SCORE = 0.6       # weaker matches are not even suggested
+FUZZY_RESOLVE_SCORE = 0.8   # a single match this close is taken as the city
+FUZZY_MARGIN = 0.05         # ...if it beats the runner-up by at least this much
+
+
+def normalize(name):
+    """Case-, accent- and punctuation-insensitive form of a place name."""
+    decomposed = unicodedata.normalize("NFKD", str(name))
+    plain = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(re.sub(r"[^\w]+", " ", plain.casefold()).split())
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CityNameIndex:
+    """Exact, prefix and fuzzy lookups over the city and admin_name columns."""
+
+    def __init__(self, cities):
+        # Most populous first, so ties and completions favour the bigger city
+        order = cities["population"].fillna(0).sort_values(ascending=False, kind="stable").index
+        self.cities = cities.loc[order].reset_index(drop=True)
+        self._city_keys = [normalize(c) for c in self.cities["city"]]
+        self._admin_keys = [normalize(a) for a in self.cities["admin_name"].fillna("")]
+
+        self._exact = {}
+        for row, key in enumerate(self._city_keys):
+            self._exact.setdefault(key, []).append(row)
+
+        # Every word start of the city name, then the state: "jahangirpur"
+        # completes "Bhālswa Jahangirpur", "mahar" lists Maharashtra's cities
+        prefixes = set()
+        for row, (city, admin) in enumerate(zip(self._city_keys, self._admin_keys)):
+            words = city.split()
+            for i in range(len(words)):
+                prefixes.add((" ".join(words[i:]), 0 if i == 0 else 1, row))
+            if admin:
+                prefixes.add((admin, 2, row))
+        self._prefix = sorted(prefixes)
+        self._prefix_keys = [key for key, _, _ in self._prefix]
+
+        self._grams = {}
+        for row, key in enumerate(self._city_keys):
+            for gram in _trigrams(key):
+                self._grams.setdefault(gram, []).append(row)
+
+    def __len__(self):
+        return len(self.cities)
+
+    @staticmethod
+    def label(city):
+        """Display name for a city row: "City, State"."""
+        admin = city["admin_name"]
+        return f"{city['city']}, {admin}" if isinstance(admin, str) and admin else city["city"]
+
+    @staticmethod
+    def _split(query):
+        name, _, admin = str(query).partition(",")
+        return normalize(name), normalize(admin)
+
+    def _admin_ok(self, row, admin):
+        return not admin or self._admin_keys[row].startswith(admin)
+
+    def lookup(self, query):
+        """Row of the city whose name is exactly `query` (after folding), or None."""
+        name, admin = self._split(query)
+        rows = [row for row in self._exact.get(name, []) if self._admin_ok(row, admin)]
+        return self.cities.iloc[rows[0]] if rows else None
+
+    def complete(self, prefix, limit=8):
+        """Cities whose name (or any later word of it, or state) starts with `prefix`."""
+        name, admin = self._split(prefix)
+        if not name:
+            return self.cities.iloc[[]]
+        start = bisect.bisect_left(self._prefix_keys, name)
+        best = {}
+        for key, kind, row in self._prefix[start:]:
+            if not key.startswith(name):
+                break
+            if self._admin_ok(row, admin):
+                best[row] = min(kind, best.get(row, kind))
+        rows = sorted(best, key=lambda row: (best[row], row))[:limit]
+        return self.cities.iloc[rows]
+
+    def _ranked(self, name, admin, limit, min_score):
+        # Candidates share at least one trigram with the query; they are then
+        # ranked by edit similarity, which copes with swapped letters
+        shared = Counter(row for gram in _trigrams(name) for row in self._grams.get(gram, ()))
+        scored = []
+        for row in shared:
+            if self._admin_ok(row, admin):
+                score = SequenceMatcher(None, name, self._city_keys[row], autojunk=False).ratio()
+                if score >= min_score:
+                    scored.append((-score, row))
+        scored.sort()
+        return [(round(-neg, 3), row) for neg, row in scored[:limit]]
+
+    def fuzzy(self, query, limit=5, min_score=FUZZY_MIN_SCORE):
+        """Closest city names to `query`, best first, with a score column (0-1)."""
+        name, admin = self._split(query)
+        ranked = self._ranked(name, admin, limit, min_score) if name else []
+        result = self.cities.iloc[[row for _, row in ranked]].copy()
+        result["score"] = [score for score, _ in ranked]
+        return result
+
+    def resolve(self, query):
+        """Return `(city_row, score)` for the city `query` means, or None.
+
+        Exact names score 1.0. Otherwise a fuzzy match is accepted only when it
+        is close and clearly better than the next one; ambiguous or unknown
+        names return None so the caller can offer suggestions instead.
+        """
+        name, admin = self._split(query)
+        if not name:
+            return None
+        exact = [row for row in self._exact.get(name, []) if self._admin_ok(row, admin)]
+        if exact:
+            return self.cities.iloc[exact[0]], 1.0
+        ranked = self._ranked(name, admin, 2, FUZZY_MIN_SCORE) + [(0.0, None)] * 2
+        (best, row), (second, _) = ranked[0], ranked[1]
+        if row is not None and best >= FUZZY_RESOLVE_SCORE and best - second >= FUZZY_MARGIN:
+            return self.cities.iloc[row], best
+        return None
+
+    def suggest(self, query, limit=5):
+        """Labels to offer for a name that did not resolve: completions, then fuzzy matches."""
+        rows = list(self.complete(query, limit).index) + list(self.fuzzy(query, limit).index)
+        return [self.label(self.cities.iloc[int(row)]) for row in dict.fromkeys(rows)][:limit]
+
+
+@lru_cache(maxsize=None)
+def india_name_index():
+    """Process-wide name index over the Indian cities in cities.csv."""
+    return CityNameIndex(load_india_cities())
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+# ------------------------------
+# Forecast Ingestion & Daily Aggregation
+# ------------------------------
+# OpenWeather's /forecast returns 40 three-hourly steps. All of them are kept:
+# the payload is parsed into columns in one pass, then reduced to one row per
+# (city, local day) with NumPy reductions over the contiguous runs of each
+# day. Works the same for one city or for a stacked frame of every city in
+# cities.csv.
+
+STEPS_PER_DAY = 8  # 3-hour steps
+
+DAILY_COLUMNS = [
+    "date", "steps", "temp", "temp_min", "temp_max", "humidity", "humidity_mean", "wind",
+    "rain", "rain_3h", "rain_24h", "rain_72h",
+]
+
+
+def _steps(payloads):
+    """One flat pass over `(city, payload)` pairs into typed column arrays."""
+    cities, times, temp, humidity, wind, rain = [], [], [], [], [], []
+    for city, payload in payloads:
+        offset = payload.get("city", {}).get("timezone", 0)
+        for e in payload.get("list", []):
+            main = e["main"]
+            cities.append(city)
+            times.append(e["dt"] + offset)
+            temp.append(main["temp"])
+            humidity.append(main["humidity"])
+            wind.append(e.get("wind", {}).get("speed", 0))
+            rain.append(e.get("rain", {}).get("3h", 0))
+    return pd.DataFrame({
+        "city": cities,
+        "time": pd.to_datetime(np.asarray(times, dtype="int64"), unit="s"),
+        "temp": np.asarray(temp, dtype="float32"),
+        "humidity": np.asarray(humidity, dtype="float32"),
+        "wind": np.asarray(wind, dtype="float32"),
+        "rain": np.asarray(rain, dtype="float32"),
+    })
+
+
+def parse_forecast(payload, city=None):
+    """Columnar frame of every 3-hourly step in a /forecast payload.
+
+    Times are shifted to the city's local time (the payload's `timezone`
+    offset), so days split at local midnight rather than UTC.
+    """
+    frame = _steps([(city, payload)])
+    return frame if city is not None else frame.drop(columns="city")
+
+
+def _rolling_sum(values, group_start, steps):
+    # Trailing window sum within each group via cumulative sums: no Python-level loop
+    cumulative = np.cumsum(values, dtype="float64")
+    before = np.concatenate(([0.0], cumulative))  # before[i] = sum of values[:i]
+    lagged = np.maximum(np.arange(len(values)) + 1 - steps, group_start)
+    return (before[1:] - before[lagged]).astype("float32")
+
+
+def aggregate_daily(steps, days=None):
+    """Per-day rain sum, humidity, wind, min/mean/max temp and trailing rain.
+
+    `rain_3h` and `humidity_mean` are the day's mean per 3-hour step, the
+    scale risk.score_forecast_batch is calibrated for. `rain_24h` /
+    `rain_72h` are the largest trailing 24 h / 72 h rain totals reached
+    during that day (risk.forecast_rain scores wet spells with them). The last day is dropped when the forecast horizon cuts
+    it short (the first day only misses hours already past). If `steps` has
+    a `city` column the result has one row per (city, date). `days` keeps
+    the first N days per city.
+    """
+    by = ["city"] if "city" in steps.columns else []
+    if steps.empty:
+        return pd.DataFrame(columns=by + DAILY_COLUMNS)
+    if by or not steps["time"].is_monotonic_increasing:
+        steps = steps.sort_values(by + ["time"], kind="stable")
+    n = len(steps)
+    day = steps["time"].to_numpy("datetime64[s]").astype("datetime64[D]")
+    city = pd.factorize(steps["city"])[0] if by else np.zeros(n, dtype="int64")
+
+    # Rows are sorted, so every (city, day) group is a contiguous run
+    new_city = np.r_[True, city[1:] != city[:-1]]
+    starts = np.flatnonzero(new_city | np.r_[True, day[1:] != day[:-1]])
+    counts = np.diff(np.r_[starts, n])
+    city_start = np.maximum.accumulate(np.where(new_city, np.arange(n), 0))
+
+    temp = steps["temp"].to_numpy()
+    humidity = steps["humidity"].to_numpy()
+    rain = steps["rain"].to_numpy()
+    rain_sum = np.add.reduceat(rain, starts, dtype="float64")
+    columns = {
+        "steps": counts,
+        "temp": np.add.reduceat(temp, starts, dtype="float64") / counts,
+        "temp_min": np.minimum.reduceat(temp, starts),
+        "temp_max": np.maximum.reduceat(temp, starts),
+        "humidity": np.maximum.reduceat(humidity, starts),
+        "humidity_mean": np.add.reduceat(humidity, starts, dtype="float64") / counts,
+        "wind": np.maximum.reduceat(steps["wind"].to_numpy(), starts),
+        "rain": rain_sum,
+        "rain_3h": rain_sum / counts,
+        "rain_24h": np.maximum.reduceat(_rolling_sum(rain, city_start, STEPS_PER_DAY), starts),
+        "rain_72h": np.maximum.reduceat(_rolling_sum(rain, city_start, 3 * STEPS_PER_DAY), starts),
+    }
+
+    group_city = city[starts]
+    first_day = np.r_[True, group_city[1:] != group_city[:-1]]
+    last_day = np.r_[first_day[1:], True]
+    keep = ~(last_day & (counts < STEPS_PER_DAY))
+    if days is not None:
+        # Position of each day within its city, counting only kept days
+        kept_before = np.cumsum(keep) - keep
+        city_offset = np.maximum.accumulate(np.where(first_day, kept_before, 0))
+        keep &= kept_before - city_offset < days
+
+    # float64 so the rounded values print cleanly in the UI
+    daily = {"city": steps["city"].to_numpy()[starts][keep]} if by else {}
+    daily["date"] = np.datetime_as_string(day[starts][keep])
+    for name, values in columns.items():
+        daily[name] = values[keep] if name == "steps" else values[keep].astype("float64").round(1)
+    return pd.DataFrame(daily)
+
+
+def aggregate_many(payloads, days=None):
+    """Daily aggregates for many cities at once from `{city: payload}`."""
+    return aggregate_daily(_steps(payloads.items()), days)
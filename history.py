@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import quote, unquote
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+import pandas as pd
+
+# ------------------------------
+# Observation History Store
+# ------------------------------
+# One append-only file of fixed-width records per city, sorted by timestamp.
+# Reads go through np.memmap, so a window query only touches the pages it
+# needs: the timestamp column is binary-searched, and only the matching slice
+# is copied into memory. A year of 10-minute observations is ~52k records
+# (~1.2 MB) per city. Appends take an exclusive lock on the city's file, so
+# the Streamlit app and `python api.py` can share one HISTORY_DIR.
+
+HISTORY_DIR = os.getenv(
+    "HISTORY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "history")
+)
+
+RECORD = np.dtype([
+    ("ts", "<i8"),            # observation time, unix seconds (UTC)
+    ("temperature", "<f4"),
+    ("humidity", "<f4"),
+    ("wind_speed", "<f4"),
+    ("rainfall", "<f4"),
+])
+FIELDS = RECORD.names[1:]
+
+
+def _normalize(city):
+    return " ".join(city.split()).lower()
+
+
+@contextmanager
+def _file_lock(f):
+    # Held across read-last-then-write: the threading.Lock only covers one process
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)  # first byte stands for the file
+            break
+        except OSError:
+            pass  # LK_LOCK gives up after ~10 s; keep waiting
+    try:
+        yield
+    finally:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class HistoryStore:
+    def __init__(self, root=HISTORY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self.appended = 0
+        self.skipped = 0
+
+    def _path(self, city):
+        return os.path.join(self.root, quote(_normalize(city), safe="") + ".obs")
+
+    def _open(self, city):
+        path = self._path(city)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return np.empty(0, dtype=RECORD)
+        count = size // RECORD.itemsize
+        if count == 0:
+            return np.empty(0, dtype=RECORD)
+        return np.memmap(path, dtype=RECORD, mode="r", shape=(count,))
+
+    def append(self, city, weather, ts=None):
+        """Append one observation; ignored unless newer than the last one stored.
+
+        Returns True if a record was written.
+        """
+        ts = int(ts if ts is not None else weather.get("observed_at") or time.time())
+        record = np.zeros(1, dtype=RECORD)
+        record["ts"] = ts
+        for field in FIELDS:
+            record[field] = weather.get(field) or 0
+        path = self._path(city)
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(path, "ab+") as f, _file_lock(f):
+                size = f.seek(0, os.SEEK_END)
+                if size >= RECORD.itemsize:
+                    f.seek(size - size % RECORD.itemsize - RECORD.itemsize)
+                    last_ts = np.frombuffer(f.read(RECORD.itemsize), dtype=RECORD)["ts"][0]
+                    if ts <= last_ts:
+                        # Same observation served again (or out of order)
+                        self.skipped += 1
+                        return False
+                f.write(record.tobytes())
+                f.flush()  # before the lock is released
+        self.appended += 1
+        return True
+
+    def window(self, city, hours, end=None):
+        """Observations for one city in the `hours` before `end` (default now)."""
+        records = self._open(city)
+        end = int(end if end is not None else time.time())
+        lo, hi = np.searchsorted(records["ts"], [end - int(hours * 3600), end], side="right")
+        return self._frame(np.array(records[lo:hi]))
+
+    def latest(self, city, n=1):
+        records = self._open(city)
+        return self._frame(np.array(records[-n:] if n else records[:0]))
+
+    def at(self, ts, tolerance=900):
+        """The last observation at or before `ts` for every city, within `tolerance` seconds."""
+        rows, names = [], []
+        for city in self.cities():
+            records = self._open(city)
+            idx = int(np.searchsorted(records["ts"], ts, side="right")) - 1
+            if idx >= 0 and ts - records["ts"][idx] <= tolerance:
+                rows.append(records[idx])
+                names.append(city)
+        frame = self._frame(np.array(rows, dtype=RECORD))
+        frame.insert(0, "city", names)
+        return frame
+
+    def cities(self):
+        try:
+            files = os.listdir(self.root)
+        except OSError:
+            return []
+        return sorted(unquote(name[:-4]) for name in files if name.endswith(".obs"))
+
+    @staticmethod
+    def _frame(records):
+        frame = pd.DataFrame(records)
+        frame["time"] = pd.to_datetime(frame.pop("ts"), unit="s", utc=True)
+        return frame[["time", *FIELDS]]
+
+    def stats(self):
+        return {"appended": self.appended, "skipped": self.skipped, "cities": len(self.cities())}
+
+
+history = HistoryStore()
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# ------------------------------
+# Shared HTTP Client
+# ------------------------------
+# One pooled, keep-alive Session for every outbound call to OpenWeather.
+# Lives at module level so it survives Streamlit reruns.
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "8"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.3"))
+
+
+def _build_session():
+    # 429 is not retried: the OpenWeather limiter hands out one token per call,
+    # and retrying while the plan quota is exhausted only burns more of it.
+    # Retry-After is ignored: urllib3 would sleep for whatever the server asks,
+    # uncapped, so retries wait only the short, bounded backoff below.
+    retry = Retry(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=HTTP_RETRIES,
+        status=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    # pool_connections = number of hosts kept, pool_maxsize = sockets per host
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+        pool_block=False,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class LatencyStats:
+    """Per-endpoint call counts, errors and latency totals."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, endpoint, seconds, error=False):
+        with self._lock:
+            s = self._stats.setdefault(endpoint, {"calls": 0, "errors": 0, "total": 0.0, "max": 0.0})
+            s["calls"] += 1
+            s["errors"] += int(error)
+            s["total"] += seconds
+            s["max"] = max(s["max"], seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {**s, "avg": s["total"] / s["calls"] if s["calls"] else 0.0}
+                for endpoint, s in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+_session = _build_session()
+latency = LatencyStats()
+
+
+def _endpoint(url):
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
+
+
+def get(url, params=None, timeout=None, endpoint=None):
+    """GET `url` through the shared session, recording latency per endpoint.
+
+    Raises `requests.RequestException` once the retry budget is exhausted.
+    """
+    endpoint = endpoint or _endpoint(url)
+    timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    start = time.perf_counter()
+    try:
+        response = _session.get(url, params=params, timeout=timeout)
+    except requests.RequestException:
+        latency.record(endpoint, time.perf_counter() - start, error=True)
+        raise
+    latency.record(endpoint, time.perf_counter() - start, error=response.status_code >= 400)
+    return response
@@ -0,0 +1,124 @@
+"""Import-time report for weather.py.
+
+Runs every page headlessly in a fresh interpreter (``python -X importtime``)
+and reports how much import work the first run (cold start) and a second run
+(a normal rerun) of that page cost. No network access is needed.
+
+    python import_report.py            # table
+    python import_report.py --json     # machine-readable, for CI
+    python import_report.py --max-cold-ms 1500 --page About
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "weather.py")
+PAGES = [
+    "Home - Flood Prediction",
+    "Map Selection",
+    "Help Assistant",
+    "Flood Safety Tips",
+    "About",
+]
+MARK = "import_report:"
+
+
+def _mark(label, **data):
+    # stderr is where -X importtime writes, so markers keep the two in order
+    sys.stderr.write(f"{MARK}{label}:{json.dumps(data)}\n")
+    sys.stderr.flush()
+
+
+def _child(page):
+    from streamlit.testing.v1 import AppTest
+
+    _mark("baseline")
+    for run in ("cold", "rerun"):
+        start = time.perf_counter()
+        at = AppTest.from_file(APP, default_timeout=60)
+        at.run()
+        at.sidebar.radio[0].set_value(page).run()
+        _mark(run, wall_ms=(time.perf_counter() - start) * 1000)
+
+
+def _parse(stderr):
+    """Attribute -X importtime lines to the phase whose marker follows them."""
+    phases = {}
+    pending = {"self_us": 0, "count": 0, "top": {}}
+    for line in stderr.splitlines():
+        if line.startswith(MARK):
+            label, data = line[len(MARK):].split(":", 1)
+            phases[label] = {**pending, **json.loads(data)}
+            pending = {"self_us": 0, "count": 0, "top": {}}
+            continue
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        pending["self_us"] += int(self_us)
+        pending["count"] += 1
+        top = name.split(".")[0]
+        pending["top"][top] = pending["top"].get(top, 0) + int(self_us)
+    return phases
+
+
+def measure(page):
+    # The child runs on synthetic weather, without the prefetcher, history or
+    # access log: nothing reaches the network, and no lazy imports (netrc, DNS
+    # codecs) run on worker threads to garble -X importtime's nesting
+    env = {**os.environ, "WEATHER_PROVIDER": "synthetic", "PREFETCH_ENABLED": "0",
+           "HISTORY_ENABLED": "0", "ACCESS_LOG_PATH": os.devnull}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child", page],
+        capture_output=True, text=True, cwd=os.path.dirname(APP), env=env,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{page}: report child failed\n{proc.stderr[-2000:]}")
+    phases = _parse(proc.stderr)
+    result = {"page": page}
+    for run in ("cold", "rerun"):
+        phase = phases.get(run, {"self_us": 0, "count": 0, "top": {}})
+        heaviest = sorted(phase["top"].items(), key=lambda item: -item[1])[:5]
+        result[run] = {
+            "import_ms": round(phase["self_us"] / 1000, 1),
+            "modules": phase["count"],
+            "wall_ms": round(phase.get("wall_ms", 0.0), 1),
+            "heaviest": {name: round(us / 1000, 1) for name, us in heaviest},
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page", action="append", choices=PAGES, help="page(s) to measure, default all")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    parser.add_argument("--max-cold-ms", type=float, help="fail if any page's cold import time exceeds this")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child)
+        return 0
+
+    results = [measure(page) for page in (args.page or PAGES)]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'Page':<26}{'cold import ms':>16}{'modules':>9}{'rerun import ms':>17}  heaviest (cold)")
+        for r in results:
+            heaviest = ", ".join(f"{name} {ms}" for name, ms in r["cold"]["heaviest"].items())
+            print(f"{r['page']:<26}{r['cold']['import_ms']:>16}{r['cold']['modules']:>9}"
+                  f"{r['rerun']['import_ms']:>17}  {heaviest}")
+
+    if args.max_cold_ms is not None:
+        slow = [r["page"] for r in results if r["cold"]["import_ms"] > args.max_cold_ms]
+        if slow:
+            print(f"Cold import budget of {args.max_cold_ms} ms exceeded by: {', '.join(slow)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""Multi-session load test for weather.py against a local stub weather server.
+
+Every virtual user is a headless Streamlit session (AppTest) that runs a
+realistic flow: open the app, enter cities, toggle forecast days and click
+map markers. All sessions share one process, so they share the app's caches,
+quota limiter and alert dispatcher just like real users on one server.
+
+    python loadtest.py --users 50 --actions 8
+    python loadtest.py --users 200 --stub-latency-ms 300 --error-rate 0.02 --json
+
+Reports p50/p95/p99 rerun latency per action, upstream calls per action,
+memory per session and SMS alert counts.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(ROOT, "weather.py")
+HOME = "Home - Flood Prediction"
+MAP = "Map Selection"
+ALERT_CITY = "Guwahati"  # the Home page's demo branch sends an SMS alert
+
+# Relative weight of each follow-up action after a user opens the app
+ACTIONS = {"enter_city": 5, "toggle_forecast": 3, "map_click": 2}
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # peak, Linux units
+
+
+def _percentiles(samples):
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+
+    return {"count": len(ordered), "p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99),
+            "max_ms": round(ordered[-1] * 1000, 1)}
+
+
+def _share_test_runtime():
+    """Let AppTest sessions run side by side, the way a real server does.
+
+    Each AppTest run installs a mock Runtime globally and removes it when it
+    finishes, which pulls it out from under sessions still running: keep the
+    most recent mock available instead. Each AppTest also compiles the script
+    on its own, and parallel compiles can trip CPython's parser: share one
+    compiled copy, as the server's single script cache does.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    original = Runtime.instance.__func__
+    last = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            last[:] = [cls._instance]
+            return cls._instance
+        return last[0] if last else original(cls)
+
+    Runtime.instance = classmethod(instance)
+
+    get_bytecode = ScriptCache.get_bytecode
+    compiled = {}
+    lock = threading.Lock()
+
+    def shared_bytecode(self, script_path):
+        with lock:
+            if script_path not in compiled:
+                compiled[script_path] = get_bytecode(self, script_path)
+            return compiled[script_path]
+
+    ScriptCache.get_bytecode = shared_bytecode
+
+
+# ------------------------------
+# Virtual User
+# ------------------------------
+class VirtualUser:
+    def __init__(self, user_id, cities, rng, alert_share, typo_share, think):
+        self.user_id = user_id
+        self.cities = cities
+        self.rng = rng
+        self.alert_share = alert_share
+        self.typo_share = typo_share
+        self.think = think
+        self.at = None
+        self.page = HOME
+        self.timings = []   # (action, seconds)
+        self.errors = Counter()
+
+    def _timed(self, action, fn):
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            self.errors[f"{action}: {type(e).__name__}"] += 1
+        self.timings.append((action, time.perf_counter() - start))
+        if self.at is not None and self.at.exception:
+            self.errors[f"{action}: {self.at.exception[0].value.splitlines()[0][:80]}"] += 1
+        if self.think:
+            time.sleep(self.rng.uniform(0, 2 * self.think))
+
+    def _goto(self, page):
+        # Switching pages is a rerun of its own, as it is for a real user
+        if self.page != page:
+            self.at.sidebar.radio[0].set_value(page).run()
+            self.page = page
+
+    def _city_name(self):
+        if self.rng.random() < self.alert_share:
+            return ALERT_CITY
+        name = self.rng.choice(self.cities)["city"]
+        if self.rng.random() < self.typo_share and len(name) > 3:
+            i = self.rng.randrange(len(name) - 1)
+            name = name[:i] + name[i + 1] + name[i] + name[i + 2:]
+        return name
+
+    def open_app(self):
+        from streamlit.testing.v1 import AppTest
+        self.at = AppTest.from_file(APP, default_timeout=300)
+        self._timed("open_app", self.at.run)
+
+    def enter_city(self):
+        def run():
+            self._goto(HOME)
+            self.at.text_input[0].set_value(self._city_name()).run()
+        self._timed("enter_city", run)
+
+    def toggle_forecast(self):
+        buttons = [b for b in self.at.button if str(b.key or "").startswith("forecast_")] if self.page == HOME else []
+        if not buttons:
+            return self.enter_city()
+        self._timed("toggle_forecast", lambda: self.rng.choice(buttons).click().run())
+
+    def map_click(self):
+        # st_folium can't be clicked headlessly; a click resolves to the same
+        # session state the component would have produced
+        city = self.rng.choice(self.cities)
+
+        def run():
+            self._goto(MAP)
+            self.at.session_state["map_click"] = {"lat": city["lat"], "lng": city["lng"]}
+            self.at.run()
+        self._timed("map_click", run)
+
+    def run(self, actions):
+        self.open_app()
+        names, weights = zip(*ACTIONS.items())
+        for _ in range(actions):
+            getattr(self, self.rng.choices(names, weights)[0])()
+        return self
+
+
+# ------------------------------
+# Harness
+# ------------------------------
+def run_load_test(users=20, actions=5, concurrency=None, stub_latency_ms=100, error_rate=0.0,
+                  alert_share=0.05, typo_share=0.1, think_ms=0, quota=None, seed=0):
+    from stub_weather import start_stub_server
+
+    stub = start_stub_server(latency=stub_latency_ms / 1000, error_rate=error_rate, seed=seed)
+    # App modules read these at import, so set them before the first import
+    os.environ["OPENWEATHER_BASE_URL"] = stub.base_url
+    os.environ["WEATHER_PROVIDER"] = "live"
+    os.environ.setdefault("OPENWEATHER_API", "loadtest")
+    os.environ["ALERT_TRANSPORT"] = "stub"
+    if quota:
+        # Raise the OpenWeather quota to load-test the app rather than the limiter
+        os.environ["OPENWEATHER_CALLS_PER_MINUTE"] = str(quota)
+        os.environ["OPENWEATHER_BURST"] = str(quota)
+    os.environ.setdefault("PREFETCH_ENABLED", "0")
+    os.environ["HISTORY_ENABLED"] = "0"
+    os.environ["ACCESS_LOG_PATH"] = os.path.join(tempfile.mkdtemp(prefix="loadtest-"), "user_log.csv")
+
+    from alerts import dispatcher
+    from cache import cache_stats, weather_cache, forecast_cache
+    from cities import load_india_cities
+    from sweep import clear_sweeps
+    from weather_service import openweather_stats, recent_failures
+
+    cities = load_india_cities()[["city", "lat", "lng"]].to_dict("records")
+    stub.known = {" ".join(c["city"].split()).lower() for c in cities} | {ALERT_CITY.lower()}
+
+    _share_test_runtime()
+    rng = random.Random(seed)
+    vusers = [
+        VirtualUser(i, cities, random.Random(rng.random()), alert_share, typo_share, think_ms / 1000)
+        for i in range(users)
+    ]
+    # One session walks every page first, so imports, component registration
+    # and cached resources are set up once, as on a server that is already up
+    warmup = time.perf_counter()
+    VirtualUser(-1, cities, random.Random(seed), 0, 0, 0).run(0).map_click()
+    warmup = time.perf_counter() - warmup
+    # ...but users then start from cold weather caches. The warm-up sweep's
+    # fill-in is stopped first so it can't refill them during the measurement
+    clear_sweeps()
+    weather_cache.clear()
+    forecast_cache.clear()
+    recent_failures.clear()
+    cache_before = cache_stats()
+    calls_before = Counter(stub.calls)
+
+    rss_before = _rss_bytes()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency or users, thread_name_prefix="vuser") as pool:
+        list(pool.map(lambda u: u.run(actions), vusers))
+    elapsed = time.perf_counter() - started
+    rss_after = _rss_bytes()  # every session (and its state) is still referenced here
+    dispatcher.flush()
+
+    by_action = {}
+    for user in vusers:
+        for action, seconds in user.timings:
+            by_action.setdefault(action, []).append(seconds)
+    all_timings = [s for samples in by_action.values() for s in samples]
+    total_actions = len(all_timings)
+    calls = Counter(stub.calls)
+    calls.subtract(calls_before)
+    upstream = {e: calls[e] for e in ("weather", "forecast")}
+    cache = {}
+    for name, after in cache_stats().items():
+        hits = after["hits"] - cache_before[name]["hits"]
+        misses = after["misses"] - cache_before[name]["misses"]
+        cache[name] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+    errors = sum((u.errors for u in vusers), Counter())
+    return {
+        "config": {"users": users, "actions_per_user": actions, "concurrency": concurrency or users,
+                   "stub_latency_ms": stub_latency_ms, "error_rate": error_rate,
+                   "alert_share": alert_share, "typo_share": typo_share, "think_ms": think_ms, "quota": quota, "seed": seed},
+        "warmup_s": round(warmup, 2),
+        "elapsed_s": round(elapsed, 2),
+        "actions_per_s": round(total_actions / elapsed, 2) if elapsed else None,
+        "latency": {"all": _percentiles(all_timings),
+                    **{action: _percentiles(samples) for action, samples in sorted(by_action.items())}},
+        "upstream": {
+            **upstream,
+            "injected_errors": calls["errors"],
+            "per_action": round(sum(upstream.values()) / total_actions, 3) if total_actions else None,
+        },
+        "memory": {
+            "rss_before_mb": round(rss_before / 2**20, 1),
+            "rss_after_mb": round(rss_after / 2**20, 1),
+            "per_session_kb": round((rss_after - rss_before) / 1024 / users, 1) if users else None,
+        },
+        "alerts": dispatcher.stats(),
+        "cache": cache,
+        "openweather": openweather_stats(),
+        "errors": dict(errors.most_common(10)),
+    }
+
+
+def _print_report(report):
+    print(f"{report['config']['users']} users x {report['config']['actions_per_user']} actions "
+          f"in {report['elapsed_s']}s ({report['actions_per_s']} actions/s)")
+    print(f"\n{'Action':<18}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for action, p in report["latency"].items():
+        if p["count"]:
+            print(f"{action:<18}{p['count']:>7}{p['p50_ms']:>10}{p['p95_ms']:>10}{p['p99_ms']:>10}{p['max_ms']:>10}")
+    up = report["upstream"]
+    print(f"\nUpstream calls: {up['weather']} weather, {up['forecast']} forecast "
+          f"({up['per_action']} per action, {up['injected_errors']} injected errors)")
+    mem = report["memory"]
+    print(f"Memory: {mem['rss_before_mb']} -> {mem['rss_after_mb']} MB RSS ({mem['per_session_kb']} KB per session)")
+    alerts = report["alerts"]
+    print(f"Alerts: {alerts['sent']} sent, {alerts['duplicate']} duplicate, "
+          f"{alerts['rate_limited']} rate limited, {alerts['dropped']} dropped")
+    cache = report["cache"]
+    print("Cache hit rate: " + ", ".join(f"{name} {s['hit_rate']:.0%}" for name, s in cache.items()))
+    if report["errors"]:
+        print("Errors: " + "; ".join(f"{k} x{v}" for k, v in report["errors"].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="simultaneous sessions")
+    parser.add_argument("--actions", type=int, default=5, help="actions per user after opening the app")
+    parser.add_argument("--concurrency", type=int, help="threads driving sessions, default one per user")
+    parser.add_argument("--stub-latency-ms", type=float, default=100, help="stub weather API delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub calls answered with 503")
+    parser.add_argument("--alert-share", type=float, default=0.05, help="fraction of lookups for the alert city")
+    parser.add_argument("--typo-share", type=float, default=0.1, help="fraction of city names with a typo")
+    parser.add_argument("--think-ms", type=float, default=0, help="mean pause between a user's actions")
+    parser.add_argument("--quota", type=int, help="OpenWeather calls per minute (default: the app's setting)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a summary")
+    parser.add_argument("--out", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    report = run_load_test(
+        users=args.users, actions=args.actions, concurrency=args.concurrency,
+        stub_latency_ms=args.stub_latency_ms, error_rate=args.error_rate, alert_share=args.alert_share,
+        typo_share=args.typo_share, think_ms=args.think_ms, quota=args.quota, seed=args.seed,
+    )
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
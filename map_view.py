@@ -0,0 +1,88 @@
+import folium
+import streamlit as st
+from streamlit_folium import st_folium
+
+from cities import load_india_cities
+
+# ------------------------------
+# Map Selection: cached base map + risk overlay
+# ------------------------------
+# The city table and the ~160 city markers never change while the server is
+# up, so they are built once as a single GeoJSON layer and shared by every
+# session. The base map script is identical on every rerun, so the browser
+# keeps its map; only the small risk overlay is rebuilt and sent as a
+# separate feature group.
+
+MAP_CENTER = [20.5937, 78.9629]
+RISK_COLORS = {"Low": "#00b894", "Medium": "#fdcb6e", "High": "#d63031"}
+
+
+def _point(lat, lng, **properties):
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [float(lng), float(lat)]},
+        "properties": properties,
+    }
+
+
+@st.cache_resource(show_spinner=False)
+def load_map_cities():
+    return load_india_cities()
+
+
+@st.cache_resource(show_spinner=False)
+def city_markers_geojson():
+    cities = load_map_cities()
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            _point(lat, lng, city=city, popup=f"<b>{city}</b><br>Click to predict flood risk")
+            for city, lat, lng in zip(cities["city"], cities["lat"], cities["lng"])
+        ],
+    }
+
+
+def _fixed_ids(element, prefix):
+    # folium names elements with random ids; fixed ids keep the generated map
+    # script byte-identical across reruns so the browser keeps the same map
+    for i, child in enumerate(element._children.values()):
+        _fixed_ids(child, f"{prefix}_{i}")
+    element._id = prefix
+    return element
+
+
+def build_base_map():
+    m = folium.Map(location=MAP_CENTER, zoom_start=5)
+    folium.GeoJson(
+        city_markers_geojson(),
+        name="Cities",
+        tooltip=folium.GeoJsonTooltip(fields=["city"], labels=False),
+        popup=folium.GeoJsonPopup(fields=["popup"], labels=False),
+    ).add_to(m)
+    return _fixed_ids(m, "base")
+
+
+def risk_overlay(risk_df):
+    """Feature group of colored dots, one per successfully scored city."""
+    scored = risk_df[risk_df["ok"]]
+    features = [
+        _point(lat, lng, city=city, risk=level, color=RISK_COLORS.get(level, "#636e72"))
+        for city, lat, lng, level in zip(scored["city"], scored["lat"], scored["lng"], scored["Risk Level"])
+    ]
+    overlay = folium.FeatureGroup(name="Flood risk")
+    if not features:
+        return overlay
+    folium.GeoJson(
+        {"type": "FeatureCollection", "features": features},
+        marker=folium.CircleMarker(radius=9, fill=True, fill_opacity=0.8, weight=1),
+        style_function=lambda feature: {
+            "color": feature["properties"]["color"],
+            "fillColor": feature["properties"]["color"],
+        },
+        tooltip=folium.GeoJsonTooltip(fields=["city", "risk"], aliases=["City", "Flood risk"]),
+    ).add_to(overlay)
+    return overlay
+
+
+def render_map(overlay=None, **kwargs):
+    return st_folium(build_base_map(), feature_group_to_add=overlay, **kwargs)
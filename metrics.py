@@ -0,0 +1,236 @@
+import atexit
+import bisect
+import functools
+import hmac
+import os
+import threading
+import time
+
+# ------------------------------
+# Stage Timing Metrics
+# ------------------------------
+# `with span("get_weather"): ...` (or `@timed("get_weather")`) records how long
+# a stage took into a per-stage latency histogram plus call/error counters.
+# Everything is exported in the Prometheus text format: `GET /metrics` on
+# api.py, and/or a file rewritten every METRICS_FILE_INTERVAL seconds for the
+# node-exporter textfile collector. With METRICS_ENABLED=0 a span is a shared
+# no-op object, so instrumented code pays one attribute check.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_FILE = os.getenv("METRICS_FILE")
+METRICS_FILE_INTERVAL = float(os.getenv("METRICS_FILE_INTERVAL", "15"))
+# Shows the sidebar debug panel to visitors who open the app with ?admin=<token>
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Upper bounds in seconds, from cache hits (sub-ms) to slow upstream calls
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PREFIX = "flood"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (not thread-safe; the registry locks)."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.errors = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds, error=False):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.errors += int(error)
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Estimate from the buckets, interpolating linearly inside one."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.max
+
+    def snapshot(self):
+        return {
+            "calls": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.sum * 1000 / self.count, 3) if self.count else None,
+            "p50_ms": _ms(self.quantile(0.5)),
+            "p95_ms": _ms(self.quantile(0.95)),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+class _Span:
+    __slots__ = ("registry", "stage", "start")
+
+    def __init__(self, registry, stage):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.stage, time.perf_counter() - self.start, error=exc_type is not None)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class MetricsRegistry:
+    def __init__(self, enabled=METRICS_ENABLED, buckets=BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def span(self, stage):
+        """Context manager timing one run of `stage`; exceptions count as errors."""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, stage)
+
+    def timed(self, stage):
+        """Decorator form of `span`."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Span(self, stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, stage, seconds, error=False):
+        if not self.enabled:
+            return
+        with self._lock:
+            hist = self._stages.get(stage)
+            if hist is None:
+                hist = self._stages[stage] = Histogram(self.buckets)
+            hist.observe(seconds, error)
+
+    def snapshot(self):
+        """{stage: {calls, errors, avg_ms, p50_ms, p95_ms, max_ms}}, sorted by stage."""
+        with self._lock:
+            return {stage: self._stages[stage].snapshot() for stage in sorted(self._stages)}
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def render_prometheus(self):
+        """All stages in the Prometheus text exposition format (version 0.0.4)."""
+        name = f"{PREFIX}_stage_seconds"
+        lines = [
+            f"# HELP {name} Time spent per request stage.",
+            f"# TYPE {name} histogram",
+        ]
+        errors = [
+            f"# HELP {PREFIX}_stage_errors_total Stage runs that raised.",
+            f"# TYPE {PREFIX}_stage_errors_total counter",
+        ]
+        with self._lock:
+            for stage in sorted(self._stages):
+                hist = self._stages[stage]
+                label = _label(stage)
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float("inf"),), hist.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{name}_bucket{{stage="{label}",le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{stage="{label}"}} {hist.sum!r}')
+                lines.append(f'{name}_count{{stage="{label}"}} {hist.count}')
+                errors.append(f'{PREFIX}_stage_errors_total{{stage="{label}"}} {hist.errors}')
+        return "\n".join(lines + errors) + "\n"
+
+    def write_file(self, path):
+        # Write-then-rename so a scraper never reads a half-written file
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+span = registry.span
+timed = registry.timed
+
+
+# ------------------------------
+# File Export
+# ------------------------------
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def _export_loop(path, interval, stop):
+    while not stop.wait(interval):
+        try:
+            registry.write_file(path)
+        except OSError:
+            pass
+
+
+def start_file_export(path=METRICS_FILE, interval=METRICS_FILE_INTERVAL):
+    """Rewrite `path` every `interval` seconds; a no-op when unset or disabled.
+
+    Safe to call on every rerun: only the first call starts the thread.
+    """
+    global _exporter
+    if not path or not registry.enabled or _exporter is not None:
+        return
+    with _exporter_lock:
+        if _exporter is None:
+            stop = threading.Event()
+            _exporter = threading.Thread(
+                target=_export_loop, args=(path, interval, stop), name="metrics-export", daemon=True
+            )
+            _exporter.start()
+
+            def final_write():
+                stop.set()
+                try:
+                    registry.write_file(path)
+                except OSError:
+                    pass
+
+            atexit.register(final_write)
+
+
+def is_admin(token):
+    # Constant-time comparison, so response timing doesn't leak the token
+    if not ADMIN_TOKEN or not isinstance(token, str):
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8"))
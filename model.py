@@ -0,0 +1,237 @@
+"""RandomForest flood risk model: offline training and in-process serving.
+
+    python model.py train                       # synthetic data labelled by the heuristic
+    python model.py train --data labelled.csv   # columns: rain,humidity,wind,temperature,label
+    python model.py bench --rows 160            # model vs heuristic latency
+
+Training writes a versioned artifact to models/ (``flood_rf-<version>.joblib``).
+The app loads the newest one once per process and falls back to the
+heuristic in risk.py when there is none. With a model, the risk score is
+the model's expected severity (0 Low, 50 Medium, 100 High, weighted by
+class probability) and the level is read off that same score, so the two
+always agree.
+"""
+import argparse
+import glob
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from metrics import timed
+from risk import ALERTS, chance_percent, risk_levels, score_live_batch
+
+MODEL_DIR = os.getenv(
+    "MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+)
+MODEL_PATH = os.getenv("MODEL_PATH")  # pin a specific artifact; default is the newest in MODEL_DIR
+FEATURES = ["rain", "humidity", "wind", "temperature"]
+
+SEVERITY = {"Low": 0.0, "Medium": 50.0, "High": 100.0}
+MODEL_THRESHOLDS = (25, 75)  # midpoints between the severities above
+
+
+# ------------------------------
+# Training
+# ------------------------------
+def synthetic_training_set(samples=20000, seed=0):
+    """Plausible Indian weather readings labelled by the current heuristic."""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        # mostly dry, with a long monsoon tail
+        "rain": np.round(rng.exponential(15, samples) * rng.binomial(1, 0.6, samples), 1),
+        "humidity": rng.integers(10, 101, samples).astype(float),
+        "wind": np.round(rng.gamma(2.0, 2.5, samples), 1),
+        "temperature": np.round(rng.normal(28, 6, samples), 1),
+    })
+    frame["label"] = score_live_batch(frame["rain"], frame["humidity"], frame["wind"])["level"]
+    return frame
+
+
+def train(data=None, out_dir=MODEL_DIR, samples=20000, n_estimators=100, max_depth=10, seed=0):
+    from sklearn.ensemble import RandomForestClassifier
+    import joblib
+    import sklearn
+
+    frame = pd.read_csv(data) if data else synthetic_training_set(samples, seed)
+    clf = RandomForestClassifier(
+        n_estimators=n_estimators, max_depth=max_depth, random_state=seed, n_jobs=-1,
+    )
+    clf.fit(frame[FEATURES].to_numpy(dtype=float), frame["label"].astype(str))
+    clf.set_params(n_jobs=1)  # serving calls are small; thread fan-out costs more than it saves
+
+    version = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    artifact = {
+        "model": clf,
+        "version": version,
+        "features": FEATURES,
+        "classes": list(clf.classes_),
+        "trained_on": data or f"synthetic:{samples}",
+        "rows": len(frame),
+        "sklearn": sklearn.__version__,
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"flood_rf-{version}.joblib")
+    joblib.dump(artifact, path)
+    return path
+
+
+# ------------------------------
+# Serving
+# ------------------------------
+def latest_artifact(model_dir=MODEL_DIR):
+    # Versions are UTC timestamps, so the lexically largest name is the newest
+    paths = sorted(glob.glob(os.path.join(model_dir, "flood_rf-*.joblib")))
+    return paths[-1] if paths else None
+
+
+class RiskModel:
+    """Loads the artifact once and scores many cities per call."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._artifact = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.load_seconds = None
+        self.load_error = None
+        self.calls = 0
+        self.rows = 0
+        self.infer_seconds = 0.0
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return self._artifact
+        with self._lock:
+            if not self._loaded:
+                path = self.path or MODEL_PATH or latest_artifact()
+                if path and os.path.exists(path):
+                    start = time.perf_counter()
+                    try:
+                        import joblib
+                        self._artifact = joblib.load(path)
+                        self.path = path
+                    except Exception as e:
+                        self.load_error = str(e)
+                    self.load_seconds = time.perf_counter() - start
+                self._loaded = True
+        return self._artifact
+
+    @property
+    def available(self):
+        return self._ensure_loaded() is not None
+
+    @property
+    def version(self):
+        artifact = self._ensure_loaded()
+        return artifact["version"] if artifact else "heuristic"
+
+    def predict_scores(self, rain, humidity, wind, temperature):
+        """Expected severity (0-100) for arrays of readings, or None if no model is loaded."""
+        artifact = self._ensure_loaded()
+        if artifact is None:
+            return None
+        columns = {"rain": rain, "humidity": humidity, "wind": wind, "temperature": temperature}
+        X = np.column_stack([np.nan_to_num(np.asarray(columns[f], dtype=float)) for f in artifact["features"]])
+        start = time.perf_counter()
+        proba = artifact["model"].predict_proba(X)
+        self.infer_seconds += time.perf_counter() - start
+        self.calls += 1
+        self.rows += len(X)
+        return proba @ np.array([SEVERITY[c] for c in artifact["classes"]])
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "path": self.path,
+            "load_ms": None if self.load_seconds is None else round(self.load_seconds * 1000, 1),
+            "load_error": self.load_error,
+            "calls": self.calls,
+            "rows": self.rows,
+            "avg_call_ms": round(self.infer_seconds * 1000 / self.calls, 3) if self.calls else None,
+        }
+
+
+live_model = RiskModel()
+
+
+def predict_live_batch(rain, humidity, wind, temperature):
+    """Scores, levels and chances from the trained model, or the heuristic without one."""
+    score = live_model.predict_scores(
+        np.atleast_1d(rain), np.atleast_1d(humidity), np.atleast_1d(wind), np.atleast_1d(temperature)
+    )
+    if score is None:
+        return {**score_live_batch(rain, humidity, wind), "source": "heuristic"}
+    score = score.reshape(np.shape(np.asarray(rain)))
+    return {
+        "score": score,
+        "level": risk_levels(score, MODEL_THRESHOLDS),
+        "chance": chance_percent(score),
+        "source": live_model.version,
+    }
+
+
+@timed("predict_live")
+def predict_flood_live(weather):
+    scored = predict_live_batch(
+        weather['rainfall'], weather['humidity'], weather['wind_speed'], weather.get('temperature', 0)
+    )
+    level = str(np.ravel(scored["level"])[0])
+    return {"Risk Level": level, "Alert": ALERTS[level], "Risk Score": float(scored["score"])}
+
+
+# ------------------------------
+# CLI
+# ------------------------------
+def bench(rows=160, repeats=20, seed=1):
+    frame = synthetic_training_set(rows, seed)
+    args = (frame["rain"], frame["humidity"], frame["wind"], frame["temperature"])
+    model = RiskModel()
+    load_ms = None
+    if model.available:
+        load_ms = round(model.load_seconds * 1000, 1)
+
+    def run(fn):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        return (time.perf_counter() - start) * 1000 / repeats
+
+    heuristic_ms = run(lambda: score_live_batch(*args[:3]))
+    result = {"rows": rows, "heuristic_ms": round(heuristic_ms, 3), "model": model.version, "load_ms": load_ms}
+    if model.available:
+        result["model_ms"] = round(run(lambda: model.predict_scores(*args)), 3)
+        levels = risk_levels(model.predict_scores(*args), MODEL_THRESHOLDS)
+        agree = levels == score_live_batch(*args[:3])["level"]
+        result["agreement"] = round(float(np.mean(agree)), 4)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_train = sub.add_parser("train", help="train and save a new model artifact")
+    p_train.add_argument("--data", help="labelled CSV (rain,humidity,wind,temperature,label)")
+    p_train.add_argument("--samples", type=int, default=20000, help="synthetic rows when --data is not given")
+    p_train.add_argument("--out", default=MODEL_DIR, help="artifact directory")
+    p_train.add_argument("--trees", type=int, default=100)
+    p_train.add_argument("--max-depth", type=int, default=10)
+    p_bench = sub.add_parser("bench", help="compare model and heuristic latency")
+    p_bench.add_argument("--rows", type=int, default=160)
+    p_bench.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        start = time.perf_counter()
+        path = train(args.data, args.out, args.samples, args.trees, args.max_depth)
+        print(f"Saved {path} in {time.perf_counter() - start:.1f}s")
+    else:
+        for key, value in bench(args.rows, args.repeats).items():
+            print(f"{key:>14}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import atexit
+import csv
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from access_log import ACCESS_LOG_PATH, ACCESS_LOG_BACKUPS, rotated_path
+from cache import weather_cache, forecast_cache
+from city_names import india_name_index
+from weather_service import (
+    OPENWEATHER_BULK_RESERVE, get_weather, get_forecast, weather_key, forecast_key, openweather_limiter,
+)
+
+# ------------------------------
+# Popularity-driven Prefetch Scheduler
+# ------------------------------
+# Ranks cities by how often they were looked up recently (user_log.csv, read
+# incrementally) and refreshes the hottest ones shortly before their cache
+# entries expire, so popular cities are always served warm. Refreshes are
+# spaced out and are bulk calls, so they only spend quota while the shared
+# OpenWeather bucket has more than OPENWEATHER_BULK_RESERVE tokens left.
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+PREFETCH_TOP_N = int(os.getenv("PREFETCH_TOP_N", "10"))
+PREFETCH_WINDOW_DAYS = float(os.getenv("PREFETCH_WINDOW_DAYS", "7"))
+PREFETCH_MARGIN = float(os.getenv("PREFETCH_MARGIN", "0.2"))          # refresh when < 20% of TTL left
+PREFETCH_SPACING = float(os.getenv("PREFETCH_SPACING", "2"))          # seconds between refreshes
+PREFETCH_RANK_INTERVAL = float(os.getenv("PREFETCH_RANK_INTERVAL", "300"))
+PREFETCH_TICK = float(os.getenv("PREFETCH_TICK", "15"))
+FORECAST_DAYS = 10  # what the Home page asks for
+
+
+class AccessLogTail:
+    """Per-day city counts from the access log, read incrementally.
+
+    Each call parses only the rows appended since the last one. When the
+    writer rotates the file, the rest of the rotated copy is read before
+    starting on the new file, so no rows are missed or counted twice.
+    """
+
+    def __init__(self, log_path=ACCESS_LOG_PATH, backups=ACCESS_LOG_BACKUPS):
+        self.log_path = log_path
+        self.backups = backups
+        self._inode = None
+        self._offset = 0
+        self._daily = {}  # date string -> Counter of normalized city names
+
+    def _consume(self, path, offset=0):
+        # Only complete lines: the writer may be halfway through a batch
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        for row in csv.reader(data[:end].decode("utf-8", errors="replace").splitlines()):
+            # IP, Date, Time, City
+            if len(row) >= 4 and row[3].strip():
+                self._daily.setdefault(row[1], Counter())[" ".join(row[3].split()).lower()] += 1
+        return offset + end
+
+    def _catch_up(self):
+        try:
+            stat = os.stat(self.log_path)
+        except OSError:
+            stat = None
+        if self._inode is None:
+            # First read: older rows live in the rotated copies, oldest first
+            for n in range(self.backups, 0, -1):
+                try:
+                    self._consume(rotated_path(self.log_path, n))
+                except OSError:
+                    pass
+        elif stat is None or stat.st_ino != self._inode:
+            # Rotated since the last read: finish our file under its new name,
+            # then any copies rotated after it
+            for n in range(self.backups, 0, -1):
+                path = rotated_path(self.log_path, n)
+                try:
+                    if os.stat(path).st_ino == self._inode:
+                        self._consume(path, self._offset)
+                        self._inode = None
+                    elif self._inode is None:
+                        self._consume(path)
+                except OSError:
+                    pass
+            self._offset = 0
+        elif stat.st_size < self._offset:
+            # Truncated in place: start over
+            self._daily.clear()
+            self._offset = 0
+        if stat is None:
+            self._inode = -1
+            return
+        self._inode = stat.st_ino
+        try:
+            self._offset = self._consume(self.log_path, self._offset)
+        except OSError:
+            pass
+
+    def counts(self, window_days=PREFETCH_WINDOW_DAYS, now=None):
+        """Counter of normalized city names queried within the last `window_days`."""
+        self._catch_up()
+        cutoff = ((now or datetime.now()) - timedelta(days=window_days)).strftime("%Y-%m-%d")
+        for day in [day for day in self._daily if day < cutoff]:
+            del self._daily[day]
+        total = Counter()
+        for counter in self._daily.values():
+            total.update(counter)
+        return total
+
+
+class PrefetchScheduler:
+    def __init__(self, log_path=ACCESS_LOG_PATH, top_n=PREFETCH_TOP_N,
+                 window_days=PREFETCH_WINDOW_DAYS, margin=PREFETCH_MARGIN,
+                 spacing=PREFETCH_SPACING,
+                 rank_interval=PREFETCH_RANK_INTERVAL, tick=PREFETCH_TICK,
+                 limiter=openweather_limiter):
+        self.log_path = log_path
+        self.top_n = top_n
+        self.window_days = window_days
+        self.margin = margin
+        self.spacing = spacing
+        self.rank_interval = rank_interval
+        self.tick = tick
+        self.limiter = limiter
+        self._log = AccessLogTail(log_path)
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._ranked_at = None
+        self.hot = []
+        self.refreshes = 0
+        self.failures = 0
+        self.deferred = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.warm_checks = 0
+        self.warm_hits = 0
+
+    # ---- lifecycle ----
+    def start(self):
+        with self._start_lock:
+            if not self.running:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # ---- scheduling ----
+    def _locations(self):
+        # Same resolution as the Home page, so we warm the coordinate-keyed
+        # entries it reads. Spelling variants of one city are merged; names
+        # that don't resolve were never fetched.
+        merged = {}
+        for city, count in self.hot:
+            match = india_name_index().resolve(city)
+            if match is not None:
+                row = match[0]
+                key = (row["city"], row["lat"], row["lng"])
+                merged[key] = merged.get(key, 0) + count
+        return [(city, lat, lon, count) for (city, lat, lon), count in merged.items()]
+
+    def _jobs(self):
+        locations = self._locations()
+        return [
+            ("weather", city, weather_cache, weather_key(city, lat, lon),
+             lambda c=city, la=lat, lo=lon: get_weather(c, lat=la, lon=lo, refresh=True, bulk=True))
+            for city, lat, lon, _ in locations
+        ] + [
+            ("forecast", city, forecast_cache, forecast_key(city, FORECAST_DAYS, lat, lon),
+             lambda c=city, la=lat, lo=lon: get_forecast(c, FORECAST_DAYS, lat=la, lon=lo, refresh=True, bulk=True))
+            for city, lat, lon, _ in locations
+        ]
+
+    def run_once(self):
+        """Re-rank if due, then refresh every hot entry that is close to expiry."""
+        now = time.monotonic()
+        if self._ranked_at is None or now - self._ranked_at >= self.rank_interval:
+            self.hot = self._log.counts(self.window_days).most_common(self.top_n)
+            self._ranked_at = now
+
+        for _, city, cache, key, refresh in self._jobs():
+            if self._stop.is_set():
+                return
+            remaining = cache.ttl_remaining(key)
+            self.warm_checks += 1
+            if remaining is not None and remaining > 0:
+                self.warm_hits += 1
+            if remaining is not None and remaining > self.margin * cache.ttl:
+                continue
+            if self.limiter.available() < OPENWEATHER_BULK_RESERVE + 1:
+                # The bulk call would be refused: that quota is left to interactive users
+                self.deferred += 1
+                continue
+            # Lag: how long the entry had already been expired (0 if refreshed ahead of time)
+            lag = 0.0 if remaining is None or remaining > 0 else -remaining
+            self.lag_total += lag
+            self.lag_max = max(self.lag_max, lag)
+            if refresh() is None:
+                self.failures += 1
+            else:
+                self.refreshes += 1
+            self._stop.wait(self.spacing)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                self.failures += 1
+            self._stop.wait(self.tick)
+
+    # ---- metrics ----
+    def schedule(self):
+        rows = []
+        for city, lat, lon, count in self._locations():
+            w = weather_cache.ttl_remaining(weather_key(city, lat, lon))
+            f = forecast_cache.ttl_remaining(forecast_key(city, FORECAST_DAYS, lat, lon))
+            rows.append({
+                "city": city,
+                "queries": count,
+                "weather_ttl_left": None if w is None else round(w, 1),
+                "forecast_ttl_left": None if f is None else round(f, 1),
+            })
+        return rows
+
+    def stats(self):
+        attempts = self.refreshes + self.failures
+        return {
+            "running": self.running,
+            "hot_cities": len(self.hot),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "deferred_for_quota": self.deferred,
+            "avg_refresh_lag_s": round(self.lag_total / attempts, 2) if attempts else 0.0,
+            "max_refresh_lag_s": round(self.lag_max, 2),
+            "hot_warm_ratio": round(self.warm_hits / self.warm_checks, 3) if self.warm_checks else None,
+            "cache_hit_rate": {
+                "weather": round(weather_cache.stats()["hit_rate"], 3),
+                "forecast": round(forecast_cache.stats()["hit_rate"], 3),
+            },
+        }
+
+
+scheduler = PrefetchScheduler()
+atexit.register(scheduler.stop)
+
+
+def start_prefetcher():
+    """Start the process-wide scheduler once; safe to call on every rerun."""
+    if PREFETCH_ENABLED and not scheduler.running:
+        scheduler.start()
+    return scheduler
@@ -0,0 +1,192 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from urllib.parse import quote
+
+import requests
+from dotenv import load_dotenv
+
+import http_client
+from stub_weather import synthetic_current, synthetic_forecast, NOT_FOUND
+
+load_dotenv()
+
+# ------------------------------
+# Weather Providers
+# ------------------------------
+# get_weather / get_forecast ask a provider for the raw OpenWeather payload of
+# an endpoint ("weather" or "forecast"). Swapping the provider lets the whole
+# app run offline with realistic payloads, e.g. for benchmarks:
+#
+#   WEATHER_PROVIDER=live       real OpenWeather API (default)
+#   WEATHER_PROVIDER=record     live, and every response is saved to WEATHER_RECORD_DIR
+#   WEATHER_PROVIDER=replay     recorded responses; unknown locations fall back to synthetic
+#   WEATHER_PROVIDER=synthetic  generated payloads only
+#
+# Replay and synthetic honour WEATHER_PROVIDER_LATENCY_MS and
+# WEATHER_PROVIDER_ERROR_RATE to mimic a slow or flaky upstream.
+
+WEATHER_PROVIDER = os.getenv("WEATHER_PROVIDER", "live")
+WEATHER_RECORD_DIR = os.getenv(
+    "WEATHER_RECORD_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+)
+WEATHER_PROVIDER_LATENCY_MS = float(os.getenv("WEATHER_PROVIDER_LATENCY_MS", "0"))
+WEATHER_PROVIDER_ERROR_RATE = float(os.getenv("WEATHER_PROVIDER_ERROR_RATE", "0"))
+
+API_KEY = os.getenv("OPENWEATHER_API")
+BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "http://api.openweathermap.org/data/2.5").rstrip("/")
+
+SERVICE_UNAVAILABLE = {"cod": "503", "message": "injected failure"}
+
+
+def recording_key(params):
+    """Stable file name for a query: normalized city name or rounded coordinates."""
+    if "lat" in params and "lon" in params:
+        return f"{float(params['lat']):.4f},{float(params['lon']):.4f}"
+    return quote(" ".join(str(params.get("q", "")).split()).lower(), safe="")
+
+
+class WeatherProvider:
+    """Returns `(status_code, payload)` for an OpenWeather endpoint, or None on a network error."""
+
+    name = "base"
+    metered = False  # True if calls count against the OpenWeather quota
+
+    def __init__(self):
+        self.calls = Counter()
+
+    def fetch(self, endpoint, params):
+        self.calls[endpoint] += 1
+        return self._fetch(endpoint, params)
+
+    def _fetch(self, endpoint, params):
+        raise NotImplementedError
+
+
+class LiveProvider(WeatherProvider):
+    name = "live"
+    metered = True
+
+    def __init__(self, base_url=BASE_URL, api_key=API_KEY):
+        super().__init__()
+        self.base_url = base_url
+        self.api_key = api_key
+
+    def _fetch(self, endpoint, params):
+        try:
+            response = http_client.get(
+                f"{self.base_url}/{endpoint}", params={**params, "appid": self.api_key, "units": "metric"}
+            )
+        except requests.RequestException:
+            return None
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, {}
+
+
+class RecordingProvider(WeatherProvider):
+    """Passes through to another provider and saves each successful payload to disk."""
+
+    name = "record"
+
+    def __init__(self, inner=None, record_dir=WEATHER_RECORD_DIR):
+        super().__init__()
+        self.inner = inner or LiveProvider()
+        self.metered = self.inner.metered
+        self.record_dir = record_dir
+        self._lock = threading.Lock()
+
+    def _fetch(self, endpoint, params):
+        result = self.inner.fetch(endpoint, params)
+        if result is not None and result[0] == 200:
+            folder = os.path.join(self.record_dir, endpoint)
+            path = os.path.join(folder, recording_key(params) + ".json")
+            with self._lock:
+                os.makedirs(folder, exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(result[1], f)
+        return result
+
+
+class SyntheticProvider(WeatherProvider):
+    """Generated payloads (see stub_weather.py) with optional latency and errors."""
+
+    name = "synthetic"
+    generators = {"weather": synthetic_current, "forecast": synthetic_forecast}
+
+    def __init__(self, latency_ms=WEATHER_PROVIDER_LATENCY_MS, error_rate=WEATHER_PROVIDER_ERROR_RATE, seed=None):
+        super().__init__()
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _inject(self):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def _payload(self, endpoint, params):
+        return 200, self.generators[endpoint](params)
+
+    def _fetch(self, endpoint, params):
+        if self._inject():
+            self.calls["errors"] += 1
+            return 503, SERVICE_UNAVAILABLE
+        return self._payload(endpoint, params)
+
+
+class ReplayProvider(SyntheticProvider):
+    """Serves payloads captured by RecordingProvider.
+
+    Locations that were never recorded get a synthetic payload, or a 404 when
+    `fallback` is False.
+    """
+
+    name = "replay"
+
+    def __init__(self, record_dir=WEATHER_RECORD_DIR, fallback=True, **kwargs):
+        super().__init__(**kwargs)
+        self.record_dir = record_dir
+        self.fallback = fallback
+        self._loaded = {}
+
+    def _payload(self, endpoint, params):
+        path = os.path.join(self.record_dir, endpoint, recording_key(params) + ".json")
+        payload = self._loaded.get(path)
+        if payload is None and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                payload = self._loaded[path] = json.load(f)
+        if payload is not None:
+            self.calls["replayed"] += 1
+            return 200, payload
+        if self.fallback:
+            return super()._payload(endpoint, params)
+        return 404, NOT_FOUND
+
+
+PROVIDERS = {
+    "live": LiveProvider,
+    "record": RecordingProvider,
+    "replay": ReplayProvider,
+    "synthetic": SyntheticProvider,
+}
+
+provider = PROVIDERS[WEATHER_PROVIDER]()
+
+
+def set_provider(new_provider):
+    """Swap the process-wide provider (benchmarks, tests). Returns the old one."""
+    global provider
+    old, provider = provider, new_provider
+    return old
+
+
+def is_offline():
+    """True when weather comes from disk or a generator, so nothing should hit the network."""
+    return WEATHER_PROVIDER in ("replay", "synthetic")
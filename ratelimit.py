@@ -0,0 +1,91 @@
+import threading
+import time
+
+# ------------------------------
+# Token Bucket Rate Limiter
+# ------------------------------
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `capacity` banked."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self.granted = 0
+        self.rejected = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    @classmethod
+    def per_minute(cls, calls, burst=None, **kwargs):
+        return cls(calls / 60.0, burst or calls, **kwargs)
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self, tokens, reserve=0):
+        """Take tokens if available; otherwise return seconds until they will be."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens + reserve:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens + reserve - self._tokens) / self.rate
+
+    def try_acquire(self, tokens=1, reserve=0):
+        """Non-blocking: take `tokens` now or return False.
+
+        With a `reserve`, only succeeds if that many tokens are still left
+        afterwards, so background work can't drain the bucket.
+        """
+        if self._take(tokens, reserve) == 0.0:
+            self.granted += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def acquire(self, tokens=1, timeout=None, reserve=0):
+        """Wait up to `timeout` seconds (forever if None) for `tokens`.
+
+        Returns False, and counts a rejection, if the wait would exceed the
+        timeout. `reserve` works as in try_acquire.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        waited = 0.0
+        while True:
+            delay = self._take(tokens, reserve)
+            if delay == 0.0:
+                self.granted += 1
+                if waited:
+                    self.waits += 1
+                    self.wait_seconds += waited
+                return True
+            if deadline is not None and self._clock() + delay > deadline:
+                self.rejected += 1
+                return False
+            self._sleep(delay)
+            waited += delay
+
+    def available(self):
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def stats(self):
+        return {
+            "rate_per_minute": self.rate * 60,
+            "capacity": self.capacity,
+            "available": round(self.available(), 2),
+            "granted": self.granted,
+            "rejected": self.rejected,
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 3),
+        }
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+from forecast import STEPS_PER_DAY
+
+
+# ------------------------------
+# Flood Risk Scoring (vectorized)
+# ------------------------------
+# Every scorer takes array-likes of any matching shape (one city, many cities,
+# or cities x time steps) and scores them in a single NumPy pass.
+
+RISK_LEVELS = np.array(["Low", "Medium", "High"], dtype=object)
+
+LIVE_THRESHOLDS = (50, 100)
+FORECAST_THRESHOLDS = (40, 70)
+
+WEEKDAYS = np.array(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"], dtype=object)
+DAYS_OF_MONTH = np.array([f"{d:02d}" for d in range(1, 32)], dtype=object)
+MONTHS = np.array(["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], dtype=object)
+
+ALERTS = {
+    "Low": "✅ Flood risk is low. Stay Cool.",
+    "Medium": "⚠️ Flood risk is medium. Stay Safe.",
+    "High": "🚨 Flood risk is high! Move to safe place immediately.",
+}
+
+
+def _as_float(values):
+    return np.nan_to_num(np.asarray(values, dtype=float))
+
+
+def risk_levels(score, thresholds):
+    # score < t0 -> Low, t0 <= score < t1 -> Medium, otherwise High
+    return RISK_LEVELS[np.searchsorted(thresholds, score, side="right")]
+
+
+def chance_percent(score):
+    return np.minimum(100, score + 5).astype(int)
+
+
+def day_labels(dates):
+    """"Monday, 05 Aug" for each date, computed on datetime64[D] (no per-row strftime)."""
+    days = np.asarray(dates, dtype="datetime64[D]")
+    months = days.astype("datetime64[M]")
+    weekday = (days.astype(int) + 3) % 7  # 1970-01-01 was a Thursday
+    day_of_month = DAYS_OF_MONTH[(days - months).astype(int)]
+    return WEEKDAYS[weekday] + ", " + day_of_month + " " + MONTHS[months.astype(int) % 12]
+
+
+def forecast_rain(daily):
+    """Rain per 3-hour step a forecast day is scored on.
+
+    The day's own mean step, or the mean step of the wettest trailing 24 h /
+    72 h spell reaching into it if that is higher, so rain that falls across
+    midnight or keeps up for days counts in full.
+    """
+    return np.maximum.reduce([
+        _as_float(daily["rain_3h"]),
+        _as_float(daily["rain_24h"]) / STEPS_PER_DAY,
+        _as_float(daily["rain_72h"]) / (3 * STEPS_PER_DAY),
+    ])
+
+
+def score_live_batch(rain, humidity, wind):
+    """Score current weather: higher rain + humidity + wind = higher risk."""
+    score = _as_float(rain) * 0.5 + _as_float(humidity) * 0.3 + _as_float(wind) * 0.2
+    return {
+        "score": score,
+        "level": risk_levels(score, LIVE_THRESHOLDS),
+        "chance": chance_percent(score),
+    }
+
+
+def score_forecast_batch(rain, humidity, temperature):
+    """Score forecast steps: rain dominates, humidity and temperature add to it."""
+    score = _as_float(rain) * 0.6 + _as_float(humidity) * 0.3 + _as_float(temperature) * 0.1
+    return {
+        "score": score,
+        "level": risk_levels(score, FORECAST_THRESHOLDS),
+        "chance": chance_percent(score),
+    }
+
+
+# ------------------------------
+# Single-city wrappers
+# ------------------------------
+# The live one, predict_flood_live, is in model.py: it uses the trained model
+# when an artifact exists and score_live_batch otherwise.
+
+def score_forecast(forecast):
+    """Turn a get_forecast() frame into the per-day flood forecast table.
+
+    FORECAST_THRESHOLDS are calibrated for one 3-hour step, so each day is
+    scored on rain and humidity per step (forecast_rain, humidity_mean), not
+    on its rain total.
+    """
+    scored = score_forecast_batch(forecast_rain(forecast), forecast["humidity_mean"], forecast["temp"])
+    return pd.DataFrame({
+        "date": day_labels(forecast["date"]),
+        "flood_risk": scored["level"],
+        "chance": scored["chance"],
+        "temp": forecast["temp"].to_numpy(),
+        "humidity": forecast["humidity"].to_numpy(),
+        "rain": forecast["rain"].to_numpy(),
+    })
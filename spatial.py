@@ -0,0 +1,108 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from cities import load_india_cities
+
+# ------------------------------
+# City Spatial Index (KD-tree)
+# ------------------------------
+# Points are stored as 3D unit vectors so straight-line (chord) distance is
+# monotonic with great-circle distance: no wrap-around or latitude skew, and
+# the tree stays a plain Euclidean KD-tree.
+
+EARTH_RADIUS_KM = 6371.0088
+MAP_CLICK_TOLERANCE_KM = 25
+
+
+def _to_xyz(lat, lon):
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def _chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def _km_to_chord(km):
+    return 2 * math.sin(min(math.pi / 2, km / (2 * EARTH_RADIUS_KM)))
+
+
+class CityIndex:
+    """Nearest-city and radius lookups over a cities.csv style DataFrame."""
+
+    def __init__(self, cities):
+        self.cities = cities.reset_index(drop=True)
+        self._points = _to_xyz(self.cities["lat"].to_numpy(), self.cities["lng"].to_numpy())
+        self._root = self._build(list(range(len(self._points))), 0)
+
+    def _build(self, indices, depth):
+        if not indices:
+            return None
+        axis = depth % 3
+        indices.sort(key=lambda i: self._points[i][axis])
+        mid = len(indices) // 2
+        return (
+            indices[mid],
+            axis,
+            self._build(indices[:mid], depth + 1),
+            self._build(indices[mid + 1:], depth + 1),
+        )
+
+    def _nearest(self, node, target, best):
+        if node is None:
+            return best
+        idx, axis, left, right = node
+        dist2 = float(np.sum((self._points[idx] - target) ** 2))
+        if dist2 < best[1]:
+            best = (idx, dist2)
+        diff = target[axis] - self._points[idx][axis]
+        near, far = (left, right) if diff < 0 else (right, left)
+        best = self._nearest(near, target, best)
+        if diff * diff < best[1]:
+            best = self._nearest(far, target, best)
+        return best
+
+    def _within(self, node, target, radius2, found):
+        if node is None:
+            return
+        idx, axis, left, right = node
+        dist2 = float(np.sum((self._points[idx] - target) ** 2))
+        if dist2 <= radius2:
+            found.append((idx, dist2))
+        diff = target[axis] - self._points[idx][axis]
+        if diff <= 0 or diff * diff <= radius2:
+            self._within(left, target, radius2, found)
+        if diff >= 0 or diff * diff <= radius2:
+            self._within(right, target, radius2, found)
+
+    def nearest(self, lat, lon, max_km=None):
+        """Return `(city_row, distance_km)` for the closest city, or None.
+
+        With `max_km` set, cities further away than that are not a match.
+        """
+        if self._root is None:
+            return None
+        idx, dist2 = self._nearest(self._root, _to_xyz(lat, lon), (None, math.inf))
+        distance_km = _chord_to_km(math.sqrt(dist2))
+        if max_km is not None and distance_km > max_km:
+            return None
+        return self.cities.iloc[idx], distance_km
+
+    def within(self, lat, lon, radius_km):
+        """All cities within `radius_km`, closest first, with a distance_km column."""
+        found = []
+        self._within(self._root, _to_xyz(lat, lon), _km_to_chord(radius_km) ** 2, found)
+        found.sort(key=lambda item: item[1])
+        result = self.cities.iloc[[idx for idx, _ in found]].copy()
+        result["distance_km"] = [_chord_to_km(math.sqrt(dist2)) for _, dist2 in found]
+        return result
+
+
+@lru_cache(maxsize=None)
+def india_city_index():
+    """Process-wide index over the Indian cities in cities.csv."""
+    return CityIndex(load_india_cities())
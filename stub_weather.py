@@ -0,0 +1,161 @@
+"""Local stand-in for the OpenWeather API, for offline runs, tests and load tests.
+
+    python stub_weather.py --port 8600 --latency-ms 150 --error-rate 0.02
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8600/data/2.5 streamlit run weather.py
+
+Payloads are synthetic but shaped like the real /weather and /forecast
+responses. They are deterministic per location and change every 10 minutes,
+like the real observations do.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+OBSERVATION_PERIOD = 600  # seconds between synthetic observations
+IST_OFFSET = 19800
+
+
+def _rng(location, bucket):
+    return random.Random(zlib.crc32(f"{location}|{bucket}".encode("utf-8")))
+
+
+def _location(params):
+    if "lat" in params and "lon" in params:
+        return f"{float(params['lat']):.4f},{float(params['lon']):.4f}"
+    return " ".join(params.get("q", "").split()).lower()
+
+
+def synthetic_current(params, now=None):
+    now = int(now or time.time())
+    location = _location(params)
+    dt = now - now % OBSERVATION_PERIOD
+    rng = _rng(location, dt)
+    payload = {
+        "coord": {"lat": float(params.get("lat", 0)), "lon": float(params.get("lon", 0))},
+        "main": {"temp": round(rng.uniform(18, 40), 2), "humidity": rng.randint(30, 100)},
+        "wind": {"speed": round(rng.uniform(0, 15), 2)},
+        "dt": dt,
+        "timezone": IST_OFFSET,
+        "name": params.get("q", location),
+        "cod": 200,
+    }
+    if rng.random() < 0.5:
+        payload["rain"] = {"1h": round(rng.expovariate(1 / 20), 2)}
+    return payload
+
+
+def synthetic_forecast(params, now=None):
+    now = int(now or time.time())
+    location = _location(params)
+    start = now - now % 10800 + 10800
+    rng = _rng(location, start)
+    steps = []
+    for i in range(40):
+        dt = start + i * 10800
+        step = {
+            "dt": dt,
+            "dt_txt": datetime.fromtimestamp(dt, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "main": {"temp": round(rng.uniform(18, 40), 2), "humidity": rng.randint(30, 100)},
+            "wind": {"speed": round(rng.uniform(0, 15), 2)},
+        }
+        if rng.random() < 0.4:
+            step["rain"] = {"3h": round(rng.expovariate(1 / 8), 2)}
+        steps.append(step)
+    return {"cod": "200", "cnt": 40, "list": steps,
+            "city": {"name": params.get("q", location), "timezone": IST_OFFSET}}
+
+
+NOT_FOUND = {"cod": "404", "message": "city not found"}
+ENDPOINTS = {"weather": synthetic_current, "forecast": synthetic_forecast}
+
+
+class StubWeatherServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, error_rate=0.0, known=None, seed=None):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.known = known  # optional set of lower-case names that exist
+        self.calls = Counter()
+        self._errors_rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/data/2.5"
+
+    def count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    def should_fail(self):
+        with self._lock:
+            return self._errors_rng.random() < self.error_rate
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+        server = self.server
+        if endpoint == "_stats":
+            return self._send(200, dict(server.calls))
+        if endpoint not in ENDPOINTS:
+            return self._send(404, {"cod": "404", "message": "unknown endpoint"})
+
+        server.count(endpoint)
+        if server.latency:
+            time.sleep(server.latency)
+        if server.should_fail():
+            server.count("errors")
+            return self._send(503, {"cod": "503", "message": "injected failure"})
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if "q" in params and server.known is not None and _location(params) not in server.known:
+            return self._send(404, NOT_FOUND)
+        self._send(200, ENDPOINTS[endpoint](params))
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, known=None, seed=None):
+    """Start a stub server on a background thread; returns the server (see .base_url)."""
+    server = StubWeatherServer((host, port), latency=latency, error_rate=error_rate, known=known, seed=seed)
+    threading.Thread(target=server.serve_forever, name="stub-weather", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--latency-ms", type=float, default=0, help="added delay per request")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+    server = StubWeatherServer((args.host, args.port), latency=args.latency_ms / 1000, error_rate=args.error_rate)
+    print(f"Stub OpenWeather API on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
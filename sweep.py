@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cache import TTLCache, SingleFlight
+from cities import load_india_cities
+from metrics import timed
+from model import predict_live_batch
+from weather_service import get_weather
+
+# ------------------------------
+# Bulk Risk Sweep (all cities)
+# ------------------------------
+# Weather calls are I/O bound, so a bounded thread pool gives near-linear
+# speedup up to the pool size while keeping us polite to the upstream API.
+# Sweep fetches are bulk calls: they never wait for quota, so cities that
+# don't fit in the spare quota come back as failures. latest_sweep() shares one
+# result between reruns and sessions for SWEEP_REFRESH seconds, so map clicks
+# don't sweep again, and fetches the missed cities on a background thread at
+# the pace spare quota allows; later sweeps pick them up from the cache.
+SWEEP_CONCURRENCY = int(os.getenv("SWEEP_CONCURRENCY", "16"))
+SWEEP_REFRESH = float(os.getenv("SWEEP_REFRESH", "60"))
+SWEEP_FILL_WAIT = float(os.getenv("SWEEP_FILL_WAIT", "30"))  # per city, for spare quota
+
+WEATHER_FIELDS = ["temperature", "humidity", "wind_speed", "rainfall"]
+SWEEP_COLUMNS = [
+    "city", "lat", "lng", "admin_name",
+    *WEATHER_FIELDS,
+    "Risk Level", "Risk Score", "ok",
+]
+
+
+def _fetch(row):
+    try:
+        return get_weather(row["city"], lat=row["lat"], lon=row["lng"], bulk=True)
+    except Exception:
+        # One bad city must never sink the whole sweep
+        return None
+
+
+@timed("sweep_risk")
+def sweep_risk(cities=None, max_workers=None):
+    """Fetch current weather for every city concurrently and score it.
+
+    Returns one DataFrame row per city in input order. Cities whose weather
+    could not be fetched have `ok=False` and empty risk columns.
+    """
+    if cities is None:
+        cities = load_india_cities()
+    max_workers = max_workers or SWEEP_CONCURRENCY
+    rows = cities.to_dict("records")
+    if not rows:
+        return pd.DataFrame(columns=SWEEP_COLUMNS)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(rows)), thread_name_prefix="sweep") as pool:
+        observations = list(pool.map(_fetch, rows))
+
+    risk_df = pd.DataFrame(rows)[["city", "lat", "lng", "admin_name"]]
+    weather_df = pd.DataFrame([w or {} for w in observations], columns=WEATHER_FIELDS)
+    risk_df = pd.concat([risk_df, weather_df], axis=1)
+    risk_df["ok"] = [w is not None for w in observations]
+
+    # Score every city in one vectorized pass, then blank out the failures
+    scored = predict_live_batch(
+        risk_df["rainfall"], risk_df["humidity"], risk_df["wind_speed"], risk_df["temperature"]
+    )
+    risk_df["Risk Level"] = np.where(risk_df["ok"], scored["level"], None)
+    risk_df["Risk Score"] = np.where(risk_df["ok"], scored["score"], np.nan)
+    return risk_df[SWEEP_COLUMNS]
+
+
+_sweeps = TTLCache(maxsize=8, ttl=SWEEP_REFRESH)
+_sweep_flights = SingleFlight()
+_filler = None
+_filler_stop = threading.Event()
+_filler_lock = threading.Lock()
+
+
+def _fill_in(rows, stop):
+    for row in rows:
+        if stop.is_set():
+            return
+        get_weather(row["city"], lat=row["lat"], lon=row["lng"], bulk=True, wait=SWEEP_FILL_WAIT)
+
+
+def _start_fill_in(risk_df):
+    global _filler, _filler_stop
+    missing = risk_df.loc[~risk_df["ok"], ["city", "lat", "lng"]].to_dict("records")
+    with _filler_lock:
+        if missing and (_filler is None or not _filler.is_alive()):
+            _filler_stop = threading.Event()
+            _filler = threading.Thread(
+                target=_fill_in, args=(missing, _filler_stop), name="sweep-fill", daemon=True
+            )
+            _filler.start()
+
+
+def stop_fill_in(timeout=None):
+    """Stop the background fill-in after its current fetch; returns once it has exited."""
+    with _filler_lock:
+        filler = _filler
+        _filler_stop.set()
+    if filler is not None:
+        filler.join(timeout)
+
+
+def latest_sweep(cities=None):
+    """sweep_risk() result, reused for SWEEP_REFRESH seconds by every caller."""
+    if cities is None:
+        cities = load_india_cities()
+    key = tuple(zip(cities["city"], cities["lat"], cities["lng"]))
+
+    def sweep():
+        risk_df = sweep_risk(cities)
+        _start_fill_in(risk_df)
+        return risk_df
+
+    return _sweep_flights.do(key, lambda: _sweeps.get_or_set(key, sweep))
+
+
+def clear_sweeps():
+    """Forget every cached sweep and stop the fill-in they started."""
+    stop_fill_in()
+    _sweeps.clear()
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    risk_df = sweep_risk()
+    elapsed = time.perf_counter() - start
+    print(risk_df[["city", "Risk Level", "Risk Score"]].to_string(index=False))
+    print(f"\n{int(risk_df['ok'].sum())}/{len(risk_df)} cities scored in {elapsed:.2f}s")
@@ -0,0 +1,18 @@
+from access_log import client_address
+
+
+def test_forwarded_header_is_ignored_without_trusted_proxies():
+    assert client_address("203.0.113.9", "1.2.3.4", trusted_hops=0) == "203.0.113.9"
+
+
+def test_right_most_untrusted_hop_behind_proxies():
+    # The visitor sent a spoofed entry; our one proxy appended the real address
+    assert client_address("10.0.0.2", "1.2.3.4, 198.51.100.7", trusted_hops=1) == "198.51.100.7"
+    # A CDN in front of our proxy appended one more entry
+    assert client_address("10.0.0.2", "1.2.3.4, 198.51.100.7, 10.0.0.1", trusted_hops=2) == "198.51.100.7"
+
+
+def test_short_or_missing_header_falls_back_to_peer():
+    assert client_address("10.0.0.2", "198.51.100.7", trusted_hops=2) == "10.0.0.2"
+    assert client_address("10.0.0.2", None, trusted_hops=1) == "10.0.0.2"
+    assert client_address(None, None) == "unknown"
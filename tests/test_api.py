@@ -0,0 +1,150 @@
+import json
+import os
+import tempfile
+import threading
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from stub_weather import start_stub_server
+
+# The app reads its settings at import time, so point it at the stub first
+stub = start_stub_server()
+os.environ.update({
+    "OPENWEATHER_BASE_URL": stub.base_url,
+    "OPENWEATHER_API": "test",
+    "WEATHER_PROVIDER": "live",
+    "OPENWEATHER_CALLS_PER_MINUTE": "100000",
+    "OPENWEATHER_BURST": "1000",
+    "ALERT_TRANSPORT": "stub",
+    "PREFETCH_ENABLED": "0",
+    "HISTORY_ENABLED": "0",
+    "ACCESS_LOG_PATH": os.path.join(tempfile.mkdtemp(prefix="test-api-"), "user_log.csv"),
+})
+
+from api import make_server  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = make_server("127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def call(url, body=None):
+    """(status, decoded body) for a GET, or a POST when `body` is given as bytes."""
+    request = Request(url, data=body, headers={"Content-Type": "application/json"} if body else {})
+    try:
+        with urlopen(request, timeout=30) as response:
+            status, data, kind = response.status, response.read(), response.headers["Content-Type"]
+    except HTTPError as e:
+        status, data, kind = e.code, e.read(), e.headers["Content-Type"]
+    return status, json.loads(data) if kind.startswith("application/json") else data.decode()
+
+
+# ------------------------------
+# /risk
+# ------------------------------
+def test_risk_for_a_city(base_url):
+    status, body = call(f"{base_url}/risk?city=Delhi")
+    assert status == 200
+    assert body["city"] == "Delhi"
+    assert body["risk"]["level"] in ("Low", "Medium", "High")
+    assert set(body["weather"]) >= {"temperature", "humidity", "rainfall", "wind_speed"}
+
+
+def test_risk_resolves_typos_and_coordinates(base_url):
+    assert call(f"{base_url}/risk?city=Dehli")[1]["city"] == "Delhi"
+    status, body = call(f"{base_url}/risk?lat=19.07&lon=72.88")
+    assert status == 200
+    assert "risk" in body
+
+
+def test_risk_with_forecast(base_url):
+    status, body = call(f"{base_url}/risk?city=Mumbai&forecast=1")
+    assert status == 200
+    assert body["forecast"]
+    assert {"date", "flood_risk", "chance"} <= set(body["forecast"][0])
+
+
+def test_unknown_city_is_404_with_suggestions_and_no_upstream_call(base_url):
+    before = dict(stub.calls)
+    status, body = call(f"{base_url}/risk?city=Mum")
+    assert status == 404
+    assert body["error"] == "unknown city"
+    assert any(s.startswith("Mumbai") for s in body["suggestions"])
+    assert dict(stub.calls) == before
+
+
+@pytest.mark.parametrize("query", ["", "?lat=19.07", "?lat=north&lon=72.88"])
+def test_risk_bad_query_is_400(base_url, query):
+    status, body = call(f"{base_url}/risk{query}")
+    assert status == 400
+    assert body["error"]
+
+
+# ------------------------------
+# /risk/batch
+# ------------------------------
+def test_batch_get(base_url):
+    status, body = call(f"{base_url}/risk/batch?cities=Delhi,Mumbai,Xyzzyville")
+    assert status == 200
+    assert body["results"]["Delhi"]["risk"]["level"] in ("Low", "Medium", "High")
+    assert body["results"]["Mumbai"]["city"] == "Mumbai"
+    assert body["missing"] == ["Xyzzyville"]
+
+
+def test_batch_post(base_url):
+    status, body = call(f"{base_url}/risk/batch", json.dumps({"cities": ["Chennai", "Pune"]}).encode())
+    assert status == 200
+    assert sorted(body["results"]) == ["Chennai", "Pune"]
+    assert body["missing"] == []
+
+
+@pytest.mark.parametrize("data", [
+    b"not json",
+    b'["Delhi", "Mumbai"]',
+    b'"Delhi"',
+    b"{}",
+    b'{"cities": "Delhi"}',
+    b'{"cities": []}',
+])
+def test_batch_post_bad_body_is_400(base_url, data):
+    status, body = call(f"{base_url}/risk/batch", data)
+    assert status == 400
+    assert body["error"]
+
+
+def test_batch_get_without_cities_is_400(base_url):
+    assert call(f"{base_url}/risk/batch")[0] == 400
+
+
+def test_batch_size_is_capped(base_url):
+    cities = json.dumps({"cities": ["Delhi"] * 1000}).encode()
+    status, body = call(f"{base_url}/risk/batch", cities)
+    assert status == 400
+    assert "at most" in body["error"]
+
+
+# ------------------------------
+# /health, /metrics, unknown paths
+# ------------------------------
+def test_health(base_url):
+    assert call(f"{base_url}/health") == (200, {"status": "ok"})
+
+
+def test_metrics_is_prometheus_text(base_url):
+    call(f"{base_url}/risk?city=Delhi")
+    status, text = call(f"{base_url}/metrics")
+    assert status == 200
+    assert "# TYPE" in text
+    assert 'stage="api_risk"' in text
+
+
+def test_unknown_path_is_404(base_url):
+    assert call(f"{base_url}/nope")[0] == 404
+    assert call(f"{base_url}/risk/all", b"{}")[0] == 404
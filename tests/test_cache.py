@@ -0,0 +1,161 @@
+import threading
+
+import pytest
+
+from cache import SingleFlight, TTLCache, city_key, coord_key
+from conftest import FakeClock
+
+
+# ------------------------------
+# TTLCache
+# ------------------------------
+def test_entry_expires_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=4, ttl=10, clock=clock)
+    cache.set("a", 1)
+    clock.advance(9.9)
+    assert cache.get("a") == 1
+    clock.advance(0.1)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_per_entry_ttl_and_ttl_remaining():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.set("short", 1, ttl=2)
+    cache.set("long", 2)
+    clock.advance(1)
+    assert cache.ttl_remaining("short") == pytest.approx(1)
+    assert cache.ttl_remaining("long") == pytest.approx(9)
+    assert cache.ttl_remaining("missing") is None
+    clock.advance(2)
+    assert cache.ttl_remaining("short") == pytest.approx(-1)
+    assert cache.get("short") is None
+    # ttl_remaining is not a lookup
+    assert cache.stats()["hits"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_get_or_set_caches_values_but_not_none():
+    cache = TTLCache(ttl=60, clock=FakeClock())
+    calls = []
+
+    def loader(value):
+        calls.append(value)
+        return value
+
+    assert cache.get_or_set("k", lambda: loader(None)) is None
+    assert cache.get_or_set("k", lambda: loader(5)) == 5
+    assert cache.get_or_set("k", lambda: loader(6)) == 5
+    assert calls == [None, 5]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_invalidate_and_clear():
+    cache = TTLCache(ttl=60, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    assert cache.get("a") is None and cache.get("b") == 2
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_keys_normalize_names_and_coordinates():
+    assert city_key(" New  Delhi ") == city_key("new delhi")
+    assert coord_key(28.61391, 77.20901) == coord_key("28.61389", "77.20899")
+
+
+# ------------------------------
+# SingleFlight
+# ------------------------------
+def _run_concurrently(flights, key, fn, callers):
+    """Start `callers` threads on one key; the first becomes the leader."""
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flights.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def _wait_for_followers(flights, count):
+    # Followers are counted before they block, so this is race-free
+    for _ in range(1000):
+        if flights.stats()["coalesced"] >= count:
+            return
+        threading.Event().wait(0.005)
+    raise AssertionError("followers never joined the flight")
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def fetch():
+        runs.append(1)
+        release.wait(5)
+        return {"temp": 30}
+
+    threads, results, errors = _run_concurrently(flights, "delhi", fetch, 5)
+    _wait_for_followers(flights, 4)
+    assert flights.stats()["in_flight"] == 1
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(runs) == 1
+    assert errors == []
+    assert results == [{"temp": 30}] * 5
+    assert all(r is results[0] for r in results)
+    assert flights.stats() == {"calls": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_error_reaches_every_waiting_caller():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise ValueError("upstream down")
+
+    threads, results, errors = _run_concurrently(flights, "delhi", fetch, 3)
+    _wait_for_followers(flights, 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == []
+    assert len(errors) == 3 and all(isinstance(e, ValueError) for e in errors)
+    # The failed flight is gone: the next call runs again
+    assert flights.do("delhi", lambda: "ok") == "ok"
+    assert flights.stats()["calls"] == 2
+
+
+def test_different_keys_and_sequential_calls_are_not_coalesced():
+    flights = SingleFlight()
+    assert flights.do("a", lambda: 1) == 1
+    assert flights.do("a", lambda: 2) == 2
+    assert flights.do("b", lambda: 3) == 3
+    assert flights.stats() == {"calls": 3, "coalesced": 0, "in_flight": 0}
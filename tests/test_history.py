@@ -0,0 +1,98 @@
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from history import RECORD, HistoryStore
+
+T0 = 1_700_000_000
+
+
+def obs(rain=0.0, temp=30.0):
+    return {"temperature": temp, "humidity": 80, "wind_speed": 3.0, "rainfall": rain}
+
+
+def stamps(frame):
+    return [int(t.timestamp()) for t in frame["time"]]
+
+
+# ------------------------------
+# append
+# ------------------------------
+def test_append_skips_same_or_older_observations(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    assert store.append("Delhi", obs(), ts=T0)
+    assert not store.append("Delhi", obs(rain=5), ts=T0)
+    assert not store.append("Delhi", obs(), ts=T0 - 600)
+    assert store.append("Delhi", obs(), ts=T0 + 600)
+    assert store.stats() == {"appended": 2, "skipped": 2, "cities": 1}
+    assert stamps(store.latest("Delhi", 5)) == [T0, T0 + 600]
+    assert store.latest("Delhi")["rainfall"].tolist() == [0.0]
+
+
+def test_city_names_are_normalized(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.append("New  Delhi ", obs(), ts=T0)
+    assert not store.append("new delhi", obs(), ts=T0)
+    assert store.cities() == ["new delhi"]
+
+
+def _append_many(root, count, start):
+    store = HistoryStore(root)
+    start.wait(30)
+    for i in range(count):
+        store.append("Delhi", obs(), ts=T0 + i)
+
+
+def test_concurrent_processes_keep_records_unique_and_sorted(tmp_path):
+    # Every process offers the same observations; each must be stored once
+    start = multiprocessing.Event()
+    workers = [
+        multiprocessing.Process(target=_append_many, args=(str(tmp_path), 2000, start)) for _ in range(4)
+    ]
+    for w in workers:
+        w.start()
+    start.set()
+    for w in workers:
+        w.join(60)
+    assert all(w.exitcode == 0 for w in workers)
+    records = np.fromfile(tmp_path / "delhi.obs", dtype=RECORD)
+    assert records["ts"].tolist() == list(range(T0, T0 + 2000))
+
+
+# ------------------------------
+# window / at
+# ------------------------------
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    for i in range(7):  # T0, T0+1h, ... T0+6h
+        store.append("Delhi", obs(rain=i), ts=T0 + i * 3600)
+    store.append("Mumbai", obs(), ts=T0 + 2 * 3600 + 300)
+    store.append("Pune", obs(), ts=T0 + 5 * 3600)
+    return store
+
+
+def test_window_excludes_start_and_includes_end(store):
+    frame = store.window("Delhi", hours=3, end=T0 + 4 * 3600)
+    assert stamps(frame) == [T0 + 2 * 3600, T0 + 3 * 3600, T0 + 4 * 3600]
+    assert frame["rainfall"].tolist() == [2.0, 3.0, 4.0]
+    assert str(frame["time"].dt.tz) == "UTC"
+
+
+def test_window_outside_the_data_is_empty(store):
+    assert store.window("Delhi", hours=1, end=T0 - 1).empty
+    assert store.window("Unknown", hours=24, end=T0).empty
+
+
+def test_at_picks_the_last_record_per_city_within_tolerance(store):
+    frame = store.at(T0 + 2 * 3600 + 600, tolerance=900)
+    assert frame["city"].tolist() == ["delhi", "mumbai"]
+    assert frame["time"].tolist() == [
+        pd.Timestamp(T0 + 2 * 3600, unit="s", tz="UTC"),
+        pd.Timestamp(T0 + 2 * 3600 + 300, unit="s", tz="UTC"),
+    ]
+    # Pune's only record is later; Delhi's and Mumbai's are now too old
+    assert store.at(T0 + 5 * 3600, tolerance=60)["city"].tolist() == ["delhi", "pune"]
+    assert store.at(T0 - 1).empty
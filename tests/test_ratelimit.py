@@ -0,0 +1,65 @@
+import pytest
+
+from conftest import FakeClock
+from ratelimit import TokenBucket
+
+
+def _bucket(rate=1.0, capacity=3):
+    clock = FakeClock()
+    return TokenBucket(rate, capacity, clock=clock, sleep=clock.sleep), clock
+
+
+def test_starts_full_and_refills_at_rate():
+    bucket, clock = _bucket(rate=2, capacity=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    clock.advance(0.5)  # one token at 2/s
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    clock.advance(60)
+    assert bucket.available() == pytest.approx(3)  # never more than capacity
+
+
+def test_per_minute():
+    bucket = TokenBucket.per_minute(60, burst=10, clock=FakeClock())
+    assert bucket.rate == pytest.approx(1.0)
+    assert bucket.capacity == 10
+    assert TokenBucket.per_minute(30, clock=FakeClock()).capacity == 30
+
+
+def test_acquire_waits_for_the_next_token():
+    bucket, clock = _bucket(rate=0.5, capacity=1)
+    assert bucket.acquire(timeout=0)
+    start = clock.now
+    assert bucket.acquire(timeout=5)
+    assert clock.now - start == pytest.approx(2)
+    stats = bucket.stats()
+    assert (stats["granted"], stats["waits"], stats["rejected"]) == (2, 1, 0)
+    assert stats["wait_seconds"] == pytest.approx(2)
+
+
+def test_acquire_rejects_without_sleeping_when_the_wait_is_too_long():
+    bucket, clock = _bucket(rate=0.5, capacity=1)
+    bucket.try_acquire()
+    assert not bucket.acquire(timeout=1.9)
+    assert clock.slept == []
+    assert bucket.stats()["rejected"] == 1
+
+
+def test_acquire_without_timeout_waits_as_long_as_needed():
+    bucket, clock = _bucket(rate=0.1, capacity=1)
+    bucket.try_acquire()
+    assert bucket.acquire(tokens=1)
+    assert sum(clock.slept) == pytest.approx(10)
+
+
+def test_reserve_keeps_tokens_back():
+    bucket, clock = _bucket(rate=1, capacity=5)
+    # Only two of five tokens may go while three stay in reserve
+    assert [bucket.try_acquire(reserve=3) for _ in range(3)] == [True, True, False]
+    assert bucket.available() == pytest.approx(3)
+    # ...and those three are still there for callers without a reserve
+    assert [bucket.try_acquire() for _ in range(3)] == [True, True, True]
+    # A waiting caller with a reserve waits for the reserve to refill too
+    assert not bucket.acquire(timeout=3.9, reserve=3)
+    assert bucket.acquire(timeout=4, reserve=3)
+    assert clock.now - 1000.0 == pytest.approx(4)
@@ -1,107 +1,49 @@
-import streamlit as st
-import requests
-from sklearn.ensemble import RandomForestClassifier
-import pandas as pd
-from twilio.rest import Client
-import folium
-from streamlit_folium import st_folium
-from datetime import datetime
-import numpy as np
 import os
+import time
+
+import streamlit as st
 from dotenv import load_dotenv
 
-load_dotenv()
+from metrics import is_admin, registry, span, timed, start_file_export
 
-# ------------------------------
-# Twilio Config
-# ------------------------------
-TWILIO_SID = os.getenv("TWILIO_SID")
-TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
-TWILIO_NUMBER = os.getenv("TWILIO_NUMBER")
-TO_NUMBER = os.getenv("TO_NUMBER")
-
-def send_sms_twilio(message):
-    try:
-        client = Client(TWILIO_SID, TWILIO_AUTH_TOKEN)
-        client.messages.create(body=message, from_=TWILIO_NUMBER, to=TO_NUMBER)
-        st.success("SMS sent successfully ✅")
-    except Exception as e:
-        st.error(f"SMS failed ❌: {e}")
+# Heavy dependencies (pandas, twilio, folium, ...) are imported inside the page
+# or function that needs them, so the static pages stay cheap to load.
+# Run `python import_report.py` to see what each page pulls in.
 
-# ------------------------------
-# Weather API Functions
-# ------------------------------
-API_KEY = os.getenv("OPENWEATHER_API")
-BASE_URL_CURRENT = "http://api.openweathermap.org/data/2.5/weather"
-BASE_URL_FORECAST = "http://api.openweathermap.org/data/2.5/forecast"
-
-def get_weather(city_name):
-    url = f"{BASE_URL_CURRENT}?q={city_name}&appid={API_KEY}&units=metric"
-    response = requests.get(url)
-    data = response.json()
-    if response.status_code == 200:
-        temp = data["main"]["temp"]
-        max_temp = temp + 3.3  # ✅ always show +4°C higher than current temperature
-        return {
-            "temperature": temp,
-            "max_temp": max_temp,
-            "humidity": data["main"]["humidity"],
-            "wind_speed": data["wind"]["speed"],
-            "rainfall": data.get("rain", {}).get("1h", 0)
-        }
-    return None
-
-
-def get_forecast(city_name, days=10):
-    url = f"{BASE_URL_FORECAST}?q={city_name}&appid={API_KEY}&units=metric"
-    response = requests.get(url)
-    if response.status_code != 200:
-        return None
-    data = response.json()
-    daily_data = []
-    for entry in data['list'][:days*8:8]:
-        daily_data.append({
-            "date": entry["dt_txt"].split(" ")[0],
-            "temp": entry["main"]["temp"],
-            "humidity": entry["main"]["humidity"],
-            "rain": entry.get("rain", {}).get("3h",0)
-        })
-    return pd.DataFrame(daily_data)
+load_dotenv()
+_rerun_started = time.perf_counter()
+start_file_export()  # only when METRICS_FILE is set
+if os.getenv("API_IN_PROCESS") == "1":
+    # JSON API on a thread of this process, sharing its caches and quota limiter
+    from api import start_in_process
+    start_in_process()
 
 # ------------------------------
-# Simple Flood Prediction Model (live weather only)
+# SMS Alerts
 # ------------------------------
-def predict_flood_live(weather):
-    # Random logic for demo purposes
-    # Higher rain + high humidity + high wind = higher risk
-    rain = weather['rainfall']
-    humidity = weather['humidity']
-    wind = weather['wind_speed']
-    risk_score = rain*0.5 + humidity*0.3 + wind*0.2
-    if risk_score < 50:
-        level = "Low"
-        alert = "✅ Flood risk is low. Stay Cool."
-    elif risk_score < 100:
-        level = "Medium"
-        alert = "⚠️ Flood risk is medium. Stay Safe."
+def send_sms_twilio(message, city):
+    # Sent by a background worker; repeats for the same city are suppressed
+    from alerts import dispatcher, QUEUED, DUPLICATE
+    with span("sms_submit"):
+        status = dispatcher.submit(city, message)
+    if status == QUEUED:
+        st.success("SMS alert queued ✅")
+    elif status == DUPLICATE:
+        st.info("SMS alert for this city is already on its way or was sent recently.")
     else:
-        level = "High"
-        alert = "🚨 Flood risk is high! Move to safe place immediately."
-    return {"Risk Level": level, "Alert": alert, "Risk Score": risk_score}
+        st.warning(f"SMS alert not sent ({status.replace('_', ' ')}).")
 
 # ------------------------------
 # User IP Logging
 # ------------------------------
 def log_user_ip(city):
-    try:
-        ip = requests.get('https://api.ipify.org').text
-        now = datetime.now()
-        date_str = now.strftime('%Y-%m-%d')
-        time_str = now.strftime('%H:%M:%S')
-        log_df = pd.DataFrame([[ip,date_str,time_str,city]], columns=["IP","Date","Time","City"])
-        log_df.to_csv("user_log.csv", mode='a', header=False, index=False)
-    except:
-        pass
+    # Queued for the background writer with the visitor's own address
+    from access_log import access_logger, client_address
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    with span("log_access"):
+        ip = client_address(st.context.ip_address, st.context.headers.get("X-Forwarded-For"))
+        access_logger.log(ctx.session_id if ctx else "local", city, ip)
 
 # ------------------------------
 # Streamlit UI
@@ -117,16 +59,156 @@ page = st.sidebar.radio("Go to:", [
    
 ])
 
+# ------------------------------
+# Home Page Rendering
+# ------------------------------
+# The forecast panel is a fragment: it reruns on its own when one of its
+# buttons is used, with the inputs it was given on the last full run. The
+# weather cards have no widgets, so they are drawn on full reruns only.
+
+@timed("render_weather_cards")
+def render_weather_cards(weather):
+    card_css = """
+    <style>
+    .weather-card {
+        background: linear-gradient(135deg, #0b2239, #102b4a);
+        border-radius: 18px;
+        padding: 18px;
+        box-shadow: 0 6px 16px rgba(0,0,0,0.4);
+        color: white;
+        text-align: center;
+        transition: transform 0.3s ease, box-shadow 0.3s ease;
+        margin: 10px;
+    }
+    .weather-card:hover {
+        transform: scale(1.05);
+        box-shadow: 0 8px 22px rgba(0,0,0,0.6);
+    }
+    .weather-icon {
+        font-size: 40px;
+        margin-bottom: 8px;
+    }
+    .metric-title {
+        font-size: 18px;
+        font-weight: 600;
+        color: #f1f1f1;
+    }
+    .metric-value {
+        font-size: 24px;
+        font-weight: 700;
+        margin-top: 5px;
+    }
+    </style>
+    """
+    st.markdown(card_css, unsafe_allow_html=True)
+
+    # ---- Create Weather Cards ----
+    cols_top = st.columns([1, 1, 1], gap="medium")
+    with cols_top[0]:
+        st.markdown(f"""
+        <div class="weather-card">
+            <div class="weather-icon">🌡️</div>
+            <div class="metric-title">Temperature</div>
+            <div class="metric-value" style="color:#00cec9;">{weather['temperature']} °C</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with cols_top[1]:
+        st.markdown(f"""
+        <div class="weather-card">
+            <div class="weather-icon">☀️</div>
+            <div class="metric-title">Max Temp</div>
+            <div class="metric-value" style="color:#fdcb6e;">{weather['max_temp']} °C</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with cols_top[2]:
+        st.markdown(f"""
+        <div class="weather-card">
+            <div class="weather-icon">💧</div>
+            <div class="metric-title">Humidity</div>
+            <div class="metric-value" style="color:#74b9ff;">{weather['humidity']}%</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    cols_bottom = st.columns([1, 1], gap="medium")
+    with cols_bottom[0]:
+        st.markdown(f"""
+        <div class="weather-card">
+            <div class="weather-icon">💨</div>
+            <div class="metric-title">Wind Speed</div>
+            <div class="metric-value" style="color:#81ecec;">{weather['wind_speed']} m/s</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with cols_bottom[1]:
+        st.markdown(f"""
+        <div class="weather-card">
+            <div class="weather-icon">🌧️</div>
+            <div class="metric-title">Rainfall</div>
+            <div class="metric-value" style="color:#55efc4;">{weather['rainfall']} mm</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+
+@st.fragment
+@timed("render_forecast_panel")
+def render_forecast_panel(forecast_df):
+    # Toggling a day reruns only this fragment: no logging, no weather calls
+    for i, row in forecast_df.iterrows():
+        date = row["date"]
+        risk = row["flood_risk"]
+        chance = row["chance"]
+
+        if risk == "Low":
+            emoji, color = "🟢", "#00b894"
+        elif risk == "Medium":
+            emoji, color = "🟡", "#fdcb6e"
+        else:
+            emoji, color = "🔴", "#d63031"
+
+        key = f"forecast_{i}"
+
+        if st.button(f"{date} - {emoji} {risk}", key=key):
+            st.session_state.forecast_toggle[key] = not st.session_state.forecast_toggle.get(key, False)
+
+        if st.session_state.forecast_toggle.get(key, False):
+            st.markdown(f"""
+                <div style='background-color:#f0f8ff; color:black; padding:12px; border-radius:10px; margin-bottom:8px; 
+                            box-shadow: 2px 2px 6px rgba(0,0,0,0.1);'>
+                🌡️ Temp: {row['temp']} °C  | 💧 Humidity: {row['humidity']}%  | 🌧️ Rain: {row['rain']} mm
+                </div>
+            """, unsafe_allow_html=True)
+
+def use_suggested_city(label):
+    st.session_state.city_input = label
+
 # -------- Home - Flood Prediction --------
 if page == "Home - Flood Prediction":
     st.title("🌊 Flood Prediction App - India")
 
     # ---- City Input ----
-    city = st.text_input("Enter City Name", "")
+    city = st.text_input("Enter City Name", "", key="city_input")
 
     if city:
+        from weather_service import get_weather, get_flood_forecast
+        from model import predict_flood_live
+        from city_names import india_name_index
+        from prefetch import start_prefetcher
+        start_prefetcher()
+
+        # Resolve the name against cities.csv: typos are corrected, spelling
+        # variants share one cache entry (by coordinates) and unknown names
+        # never reach the weather API
+        names = india_name_index()
+        match = names.resolve(city)
+        location = {}
+        if match is not None:
+            city_row, score = match
+            location = {"lat": city_row['lat'], "lon": city_row['lng']}
+
         # Log user IP
-        log_user_ip(city)
+        log_user_ip(city_row['city'] if match else city)
 
         # ------------------------------
         # Guwahati Demo: Force High Risk + SMS Alert
@@ -149,10 +231,21 @@ if page == "Home - Flood Prediction":
             }
 
             # Send SMS alert for demo
-            send_sms_twilio(f"Guwahati Flood Alert! 🚨 Risk Level: {result['Risk Level']}")
+            send_sms_twilio(f"Guwahati Flood Alert! 🚨 Risk Level: {result['Risk Level']}", city)
+        elif match is None:
+            st.error("City not found. Check the spelling or pick one of the suggestions.")
+            weather = None
+            result = None
+            suggestions = names.suggest(city)
+            if suggestions:
+                st.markdown("**Did you mean:**")
+                for label in suggestions:
+                    st.button(label, key=f"suggest_{label}", on_click=use_suggested_city, args=(label,))
         else:
+            if score < 1:
+                st.info(f"Showing results for {names.label(city_row)}")
             # Fetch live weather data
-            weather = get_weather(city)
+            weather = get_weather(city_row['city'], **location)
             if weather:
                 # Predict flood using trained model
                 result = predict_flood_live(weather)
@@ -172,201 +265,89 @@ if page == "Home - Flood Prediction":
             st.markdown("### 🌦️ Current Weather Details")
             st.markdown("---")
 
-            card_css = """
-            <style>
-            .weather-card {
-                background: linear-gradient(135deg, #0b2239, #102b4a);
-                border-radius: 18px;
-                padding: 18px;
-                box-shadow: 0 6px 16px rgba(0,0,0,0.4);
-                color: white;
-                text-align: center;
-                transition: transform 0.3s ease, box-shadow 0.3s ease;
-                margin: 10px;
-            }
-            .weather-card:hover {
-                transform: scale(1.05);
-                box-shadow: 0 8px 22px rgba(0,0,0,0.6);
-            }
-            .weather-icon {
-                font-size: 40px;
-                margin-bottom: 8px;
-            }
-            .metric-title {
-                font-size: 18px;
-                font-weight: 600;
-                color: #f1f1f1;
-            }
-            .metric-value {
-                font-size: 24px;
-                font-weight: 700;
-                margin-top: 5px;
-            }
-            </style>
-            """
-            st.markdown(card_css, unsafe_allow_html=True)
-
-            # ---- Create Weather Cards ----
-            cols_top = st.columns([1, 1, 1], gap="medium")
-            with cols_top[0]:
-                st.markdown(f"""
-                <div class="weather-card">
-                    <div class="weather-icon">🌡️</div>
-                    <div class="metric-title">Temperature</div>
-                    <div class="metric-value" style="color:#00cec9;">{weather['temperature']} °C</div>
-                </div>
-                """, unsafe_allow_html=True)
-
-            with cols_top[1]:
-                st.markdown(f"""
-                <div class="weather-card">
-                    <div class="weather-icon">☀️</div>
-                    <div class="metric-title">Max Temp</div>
-                    <div class="metric-value" style="color:#fdcb6e;">{weather['max_temp']} °C</div>
-                </div>
-                """, unsafe_allow_html=True)
-
-            with cols_top[2]:
-                st.markdown(f"""
-                <div class="weather-card">
-                    <div class="weather-icon">💧</div>
-                    <div class="metric-title">Humidity</div>
-                    <div class="metric-value" style="color:#74b9ff;">{weather['humidity']}%</div>
-                </div>
-                """, unsafe_allow_html=True)
-
-            cols_bottom = st.columns([1, 1], gap="medium")
-            with cols_bottom[0]:
-                st.markdown(f"""
-                <div class="weather-card">
-                    <div class="weather-icon">💨</div>
-                    <div class="metric-title">Wind Speed</div>
-                    <div class="metric-value" style="color:#81ecec;">{weather['wind_speed']} m/s</div>
-                </div>
-                """, unsafe_allow_html=True)
-
-            with cols_bottom[1]:
-                st.markdown(f"""
-                <div class="weather-card">
-                    <div class="weather-icon">🌧️</div>
-                    <div class="metric-title">Rainfall</div>
-                    <div class="metric-value" style="color:#55efc4;">{weather['rainfall']} mm</div>
-                </div>
-                """, unsafe_allow_html=True)
+            render_weather_cards(weather)
 
             # ------------------ Flood Risk Visualization (10-Day Forecast Section) ------------------
-            def get_flood_forecast(city, days=10):
-                forecast = get_forecast(city, days)
-                if forecast is None or forecast.empty:
-                    return None
-
-                flood_forecast = []
-                for _, row in forecast.iterrows():
-                    rain = row["rain"]
-                    humidity = row["humidity"]
-                    temp = row["temp"]
-
-                    score = (rain * 0.6) + (humidity * 0.3) + (temp * 0.1)
-
-                    if score < 40:
-                        risk = "Low"
-                    elif score < 70:
-                        risk = "Medium"
-                    else:
-                        risk = "High"
-
-                    flood_forecast.append({
-                        "date": datetime.strptime(row["date"], "%Y-%m-%d").strftime("%A, %d %b"),
-                        "flood_risk": risk,
-                        "chance": int(min(100, score + 5)),
-                        "temp": temp,
-                        "humidity": humidity,
-                        "rain": rain
-                    })
-
-                return pd.DataFrame(flood_forecast)
-
             # ---- Toggle-able 10-Day Flood Forecast ----
             if "forecast_toggle" not in st.session_state:
                 st.session_state.forecast_toggle = {}
 
-            forecast_df = get_flood_forecast(city, days=10)
+            forecast_df = get_flood_forecast(city_row['city'] if match else city, days=10, **location)
 
             if forecast_df is not None and not forecast_df.empty:
                 st.markdown("   ")
                 st.markdown("---")
-                st.markdown("### 🌧️ 5-Day Flood Prediction Forecast")
+                st.markdown(f"### 🌧️ {len(forecast_df)}-Day Flood Prediction Forecast")
                 st.markdown("---")
 
-                for i, row in forecast_df.iterrows():
-                    date = row["date"]
-                    risk = row["flood_risk"]
-                    chance = row["chance"]
-
-                    if risk == "Low":
-                        emoji, color = "🟢", "#00b894"
-                    elif risk == "Medium":
-                        emoji, color = "🟡", "#fdcb6e"
-                    else:
-                        emoji, color = "🔴", "#d63031"
-
-                    key = f"forecast_{i}"
-
-                    if st.button(f"{date} - {emoji} {risk}", key=key):
-                        st.session_state.forecast_toggle[key] = not st.session_state.forecast_toggle.get(key, False)
-
-                    if st.session_state.forecast_toggle.get(key, False):
-                        st.markdown(f"""
-                            <div style='background-color:#f0f8ff; color:black; padding:12px; border-radius:10px; margin-bottom:8px; 
-                                        box-shadow: 2px 2px 6px rgba(0,0,0,0.1);'>
-                            🌡️ Temp: {row['temp']} °C  | 💧 Humidity: {row['humidity']}%  | 🌧️ Rain: {row['rain']} mm
-                            </div>
-                        """, unsafe_allow_html=True)
+                render_forecast_panel(forecast_df)
             else:
                 st.warning("⚠️ Flood forecast data not available.")
-        else:
+        elif match is not None:
             st.error("City not found or weather API error.")
 
 # -------- Map Selection --------
 # -------------------------------
 if page == "Map Selection":
+    from weather_service import get_weather
+    from model import predict_flood_live
+    from sweep import latest_sweep
+    from spatial import india_city_index, MAP_CLICK_TOLERANCE_KM
+    from map_view import load_map_cities, risk_overlay, render_map
+    from prefetch import start_prefetcher
+    start_prefetcher()
+
     st.title("🗺 Flood Prediction via Map")
     
-    # Load city data
-    cities_df = pd.read_csv("cities.csv")  # tumhara CSV path
-    india_cities = cities_df[cities_df['country'] == 'India']
-
-    # Initialize map
-    m = folium.Map(location=[20.5937,78.9629], zoom_start=5)
-
-    # Add markers for all Indian cities
-    for idx, row in india_cities.iterrows():
-        city_name = row['city']
-        lat = row['lat']
-        lon = row['lng']
-        folium.Marker(
-            location=[lat, lon],
-            tooltip=city_name,
-            popup=f"<b>{city_name}</b><br>Click to predict flood risk"
-        ).add_to(m)
-
-    # Render map
-    map_data = st_folium(m, width=900, height=600)
-
-    # Handle marker click
-    if map_data and map_data.get('last_object_clicked'):
-        clicked_lat = map_data['last_object_clicked']['lat']
-        clicked_lng = map_data['last_object_clicked']['lng']
-        
-        # Find the city based on lat/lng
-        city_row = india_cities[
-            (india_cities['lat'] == clicked_lat) & 
-            (india_cities['lng'] == clicked_lng)
-        ]
-        
-        if not city_row.empty:
-            city_name = city_row.iloc[0]['city']
-            weather = get_weather(city_name)
+    # Load city data (parsed once per process)
+    india_cities = load_map_cities()
+
+    # Live risk for every city in one concurrent sweep, shared by reruns and
+    # sessions for SWEEP_REFRESH seconds
+    show_risk = st.checkbox("Color markers by live flood risk", value=True)
+    overlay = None
+    if show_risk:
+        with st.spinner("Checking flood risk for all cities..."):
+            risk_df = latest_sweep(india_cities)
+        overlay = risk_overlay(risk_df)
+        failed = int((~risk_df['ok']).sum())
+        if failed:
+            st.warning(f"Weather data unavailable for {failed} of {len(risk_df)} cities; "
+                       "they fill in as API quota frees up.")
+
+    # Render the cached base map; only the risk overlay is rebuilt per rerun.
+    # Panning/zooming no longer triggers a rerun, only clicks do.
+    with span("render_map"):
+        map_data = render_map(
+            overlay,
+            key="flood_map",
+            width=900,
+            height=600,
+            returned_objects=["last_object_clicked", "last_clicked"],
+        )
+
+    # Handle marker click (or a click anywhere near a city)
+    clicks = {k: (map_data or {}).get(k) for k in ('last_object_clicked', 'last_clicked')}
+    previous = st.session_state.get('map_clicks', {})
+    changed = [k for k, v in clicks.items() if v and v != previous.get(k)]
+    st.session_state.map_clicks = clicks
+    if changed:
+        st.session_state.map_click = clicks[changed[0]]
+
+    click = st.session_state.get('map_click')
+    if click:
+        clicked_lat = click['lat']
+        clicked_lng = click['lng']
+
+        # Resolve the click to the nearest city instead of exact float matching
+        match = india_city_index().nearest(clicked_lat, clicked_lng, max_km=MAP_CLICK_TOLERANCE_KM)
+
+        if match is None:
+            st.warning(f"No city within {MAP_CLICK_TOLERANCE_KM} km of the selected point.")
+        else:
+            city_row, _ = match
+            city_name = city_row['city']
+            weather = get_weather(city_name, lat=city_row['lat'], lon=city_row['lng'])
             if weather:
                 result = predict_flood_live(weather)
                 st.success(f"City: {city_name}")
@@ -374,6 +355,10 @@ if page == "Map Selection":
                 st.info(result['Alert'])
             else:
                 st.error("Weather data not available for this city")
+
+    if show_risk:
+        with st.expander("📋 Flood risk for all cities"):
+            st.dataframe(risk_df[risk_df['ok']].drop(columns=['ok']).sort_values('Risk Score', ascending=False), hide_index=True)
 #-------------------------------
 # -------- Help Chatbot --------
 # -----------------------------
@@ -535,3 +520,15 @@ elif page == "About":
     st.write("- Gautam Chauhan")
     st.write("- Focused on real-time flood awareness & citizen safety")
     st.write("- Inspired to create a user-friendly, professional flood alert system")
+
+# ------------------------------
+# Admin Debug Panel
+# ------------------------------
+# Open the app with ?admin=<ADMIN_TOKEN> to see where reruns spend their time
+registry.observe(f"page:{page}", time.perf_counter() - _rerun_started)
+if is_admin(st.query_params.get("admin")):
+    with st.sidebar.expander("🛠️ Debug: stage timings"):
+        st.dataframe([{"stage": stage, **stats} for stage, stats in registry.snapshot().items()], hide_index=True)
+        from cache import cache_stats
+        from weather_service import openweather_stats
+        st.json({"cache": cache_stats(), "openweather": openweather_stats()}, expanded=False)
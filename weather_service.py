@@ -0,0 +1,171 @@
+import os
+
+from dotenv import load_dotenv
+
+import providers
+from metrics import span, timed
+from cache import weather_cache, forecast_cache, city_key, coord_key, SingleFlight, TTLCache
+from ratelimit import TokenBucket
+from forecast import parse_forecast, aggregate_daily
+from history import history
+from risk import score_forecast
+
+load_dotenv()
+
+# ------------------------------
+# Weather API Functions
+# ------------------------------
+# Payloads come from providers.provider: the live API by default, or a
+# recorded/synthetic backend (WEATHER_PROVIDER) for offline runs.
+
+# Plan quota shared by every session in the process. Interactive callers queue
+# for up to OPENWEATHER_MAX_WAIT seconds before a call is rejected (treated as
+# an error). Bulk callers (map sweep, prefetch, batch API) only take a token
+# while OPENWEATHER_BULK_RESERVE more are left for interactive users, and by
+# default don't wait at all: a location that just failed for them is skipped
+# for OPENWEATHER_FAILURE_TTL seconds instead of being retried on every pass.
+OPENWEATHER_CALLS_PER_MINUTE = float(os.getenv("OPENWEATHER_CALLS_PER_MINUTE", "60"))
+OPENWEATHER_BURST = int(os.getenv("OPENWEATHER_BURST", "10"))
+OPENWEATHER_MAX_WAIT = float(os.getenv("OPENWEATHER_MAX_WAIT", "5"))
+OPENWEATHER_BULK_RESERVE = float(os.getenv("OPENWEATHER_BULK_RESERVE", "5"))
+OPENWEATHER_FAILURE_TTL = float(os.getenv("OPENWEATHER_FAILURE_TTL", "30"))
+
+openweather_limiter = TokenBucket.per_minute(OPENWEATHER_CALLS_PER_MINUTE, OPENWEATHER_BURST)
+# Identical requests that arrive while one is already in flight share its result
+openweather_flights = SingleFlight()
+# Locations whose last fetch failed; only bulk callers skip them
+recent_failures = TTLCache(maxsize=1024, ttl=OPENWEATHER_FAILURE_TTL)
+
+HISTORY_ENABLED = os.getenv("HISTORY_ENABLED", "1") == "1"
+
+
+def _acquire(bulk, wait):
+    if not bulk:
+        return openweather_limiter.acquire(timeout=OPENWEATHER_MAX_WAIT if wait is None else wait)
+    if not wait:
+        return openweather_limiter.try_acquire(reserve=OPENWEATHER_BULK_RESERVE)
+    return openweather_limiter.acquire(timeout=wait, reserve=OPENWEATHER_BULK_RESERVE)
+
+
+def _api_get(endpoint, params, bulk=False, wait=None):
+    source = providers.provider
+    if source.metered and not _acquire(bulk, wait):
+        return None
+    with span(f"upstream_{endpoint}"):
+        return source.fetch(endpoint, params)
+
+
+def _fetch_weather(params, bulk=False, wait=None):
+    response = _api_get("weather", params, bulk, wait)
+    if response is None:
+        return None
+    status, data = response
+    if status == 200:
+        temp = data["main"]["temp"]
+        max_temp = temp + 3.3  # ✅ always show +4°C higher than current temperature
+        return {
+            "temperature": temp,
+            "max_temp": max_temp,
+            "humidity": data["main"]["humidity"],
+            "wind_speed": data["wind"]["speed"],
+            "rainfall": data.get("rain", {}).get("1h", 0),
+            "observed_at": data.get("dt"),
+        }
+    return None
+
+
+def _fetch_forecast(params, days, bulk=False, wait=None):
+    response = _api_get("forecast", params, bulk, wait)
+    if response is None or response[0] != 200:
+        return None
+    with span("parse_forecast"):
+        return aggregate_daily(parse_forecast(response[1]), days)
+
+
+def _query(city_name, lat, lon):
+    # Map clicks already know the coordinates, so query (and cache) by lat/lon
+    if lat is not None and lon is not None:
+        return coord_key(lat, lon), {"lat": lat, "lon": lon}
+    return city_key(city_name), {"q": city_name.strip()}
+
+
+def _fetch_and_record(city_name, params, bulk=False, wait=None):
+    weather = _fetch_weather(params, bulk, wait)
+    if weather is not None and HISTORY_ENABLED:
+        # Only fresh upstream observations are stored; cache hits add nothing new
+        label = city_name or f"{params['lat']},{params['lon']}"
+        try:
+            history.append(label, weather)
+        except OSError:
+            pass
+    return weather
+
+
+def _load(flight_key, fetch, bulk, wait):
+    # Calls only share a flight with callers of the same kind: a user never
+    # inherits a bulk caller's quota rejection, and a non-waiting bulk call
+    # never queues behind a waiting one. Bulk callers that wait are deliberate
+    # retries, so only the non-waiting ones skip recent failures.
+    if bulk and not wait and recent_failures.get(flight_key):
+        return None
+    value = openweather_flights.do(flight_key + (bulk, bool(wait)), fetch)
+    if value is None:
+        recent_failures.set(flight_key, True)
+    return value
+
+
+def _refreshed(cache, key, loader):
+    value = loader()
+    if value is not None:
+        cache.set(key, value)
+    return value
+
+
+def weather_key(city_name=None, lat=None, lon=None):
+    return _query(city_name, lat, lon)[0]
+
+
+def forecast_key(city_name=None, days=10, lat=None, lon=None):
+    return _query(city_name, lat, lon)[0] + (days,)
+
+
+@timed("get_weather")
+def get_weather(city_name=None, lat=None, lon=None, refresh=False, bulk=False, wait=None):
+    """Current weather, served from the shared cache unless `refresh` is set.
+
+    `bulk` callers leave OPENWEATHER_BULK_RESERVE tokens alone and wait `wait`
+    seconds (default 0) for spare quota; they get None when there is none.
+    """
+    key, params = _query(city_name, lat, lon)
+    loader = lambda: _load(("weather",) + key, lambda: _fetch_and_record(city_name, params, bulk, wait), bulk, wait)
+    if refresh:
+        return _refreshed(weather_cache, key, loader)
+    return weather_cache.get_or_set(key, loader)
+
+
+@timed("get_forecast")
+def get_forecast(city_name=None, days=10, lat=None, lon=None, refresh=False, bulk=False, wait=None):
+    key, params = _query(city_name, lat, lon)
+    key = key + (days,)
+    loader = lambda: _load(("forecast",) + key, lambda: _fetch_forecast(params, days, bulk, wait), bulk, wait)
+    if refresh:
+        return _refreshed(forecast_cache, key, loader)
+    return forecast_cache.get_or_set(key, loader)
+
+
+def get_flood_forecast(city_name=None, days=10, lat=None, lon=None):
+    forecast = get_forecast(city_name, days, lat=lat, lon=lon)
+    if forecast is None or forecast.empty:
+        return None
+    with span("score_forecast"):
+        return score_forecast(forecast)
+
+
+def openweather_stats():
+    return {
+        "provider": providers.provider.name,
+        "provider_calls": dict(providers.provider.calls),
+        "limiter": openweather_limiter.stats(),
+        "single_flight": openweather_flights.stats(),
+        "recent_failures": len(recent_failures),
+    }